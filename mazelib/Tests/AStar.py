@@ -0,0 +1,64 @@
+from heapq import heappop, heappush
+
+import numpy as np
+
+from SolveAlgo import solveAlgo
+from adjacency import flat_neighbour_offsets
+from disjoint_set import index_dtype
+from events import VISIT
+from utils import manhattan_distance
+
+class AStar(solveAlgo):
+    # A* search over flat grid indices, guided by the Manhattan distance to the end
+
+    def _solve(self):
+        width = self.grid.shape[1]
+        steps = flat_neighbour_offsets(width)
+        open_directions = memoryview(self.adjacency.reshape(-1))
+        start = self.start[0] * width + self.start[1]
+        end = self.end[0] * width + self.end[1]
+
+        # Cost of the best known route to every cell (-1 = not reached) and the cell it came from
+        costs = self.overlay("costs", np.int32, -1)
+        parents = self.overlay("parents", index_dtype(self.grid.size), -1)
+        cost = memoryview(costs.reshape(-1))
+        parent = memoryview(parents.reshape(-1))
+
+        cost[start] = 0
+        # Heap of (estimated total cost, -cost so far, cell); deeper cells win ties
+        heap = [(manhattan_distance(self.start, self.end), 0, start)]
+        expanded = peak = 0
+        emit = None if self.events is None else self.events.emit
+        while heap:
+            if len(heap) > peak:
+                peak = len(heap)
+            _, g, current = heappop(heap)
+            g = -g
+            if current == end:
+                break
+            # Skip entries made stale by a cheaper route found later
+            if g > cost[current]:
+                continue
+            expanded += 1
+            if emit is not None:
+                emit(current, VISIT)
+            # Moving to a neighbouring cell covers two grid steps
+            g += 2
+            for step in steps[open_directions[current]]:
+                n = current + step
+                if cost[n] < 0 or g < cost[n]:
+                    cost[n] = g
+                    parent[n] = current
+                    heappush(heap, (g + manhattan_distance(divmod(n, width), self.end), -g, n))
+        else:
+            # The end cannot be reached from the start
+            self.counters = {"cells_expanded": expanded, "peak_heap": peak}
+            return []
+        self.counters = {"cells_expanded": expanded, "peak_heap": peak}
+
+        # Follow the parents back from the end
+        cells = [end]
+        while cells[-1] != start:
+            cells.append(parent[cells[-1]])
+        cells.reverse()
+        return [self.flat_path(cells)]
@@ -1,43 +1,90 @@
+from itertools import permutations
 import numpy as np
-from random import randrange, choice
 
 from GenAlgo import genAlgo
+from events import CARVE, RETREAT
+from disjoint_set import index_dtype
+
+# Value the outer wall is temporarily marked with so no step can leave the grid
+BORDER = 2
+
+# Number of random direction orders drawn at a time
+PERMUTATION_BLOCK = 1 << 16
 
 class BacktrackingGenerator(genAlgo):
-    def __init__(self, w, h):
-        super(BacktrackingGenerator, self).__init__(w, h)
+    def __init__(self, w, h, d=None, factory=None, seed=None):
+        super(BacktrackingGenerator, self).__init__(w, h, d, factory, seed)
 
     def generate(self):
-        # Create an empty grid of dimensions HxW filled with walls (1s)
-        grid = np.empty((self.H, self.W), dtype=np.int8)
-        grid.fill(1)
+        # Create an empty grid of dimensions HxW (or DxHxW) filled with walls (1s).
+        # With a disk-backed grid the walk still jumps between rows at random, so pages are
+        # touched in no particular order; only the stack below is accessed sequentially
+        grid = self.empty_grid()
+        # Mark the outer wall so it never looks like an unvisited neighbour
+        self.mark_border(grid, BORDER)
+
+        # Work on flat indices: each direction is a (wall, neighbour) pair of offsets
+        cells = memoryview(grid.reshape(-1))
+        orders = [tuple(p) for p in permutations(self.flat_offsets())]
 
-        # Choose a random starting point (odd row and column indices)
-        crow = randrange(1, self.H, 2)
-        ccol = randrange(1, self.W, 2)
+        # Choose a random starting point (odd index along every axis)
+        current = sum(self.rng.randrange(1, size, 2) * stride for size, stride in zip(self.shape, self.flat_strides()))
         # Mark the starting point as a passage (0)
-        grid[crow][ccol] = 0
+        cells[current] = 0
+        emit = None if self.events is None else self.events.emit
+        if emit is not None:
+            emit(current, CARVE)
 
-        # Initialize a stack to keep track of visited cells
-        track = [(crow, ccol)]
+        # Preallocated stack of flat cell indices; every cell is pushed at most once
+        stack = self.allocate((self.num_cells(),), index_dtype(grid.size))
+        track = memoryview(stack)
+        track[0] = current
+        top = 0
+        peak = 0
+        draws = []
+        pos = 0
+        # The loop runs exactly twice per cell (once when it is pushed, once when it is
+        # popped), so blocks never draw more orders than are left to use
+        remaining = 2 * self.num_cells()
+        pushes = 0
+        pops = 0
 
         # Main loop to generate the maze
-        while track:
-            # Get the current cell's coordinates
-            (crow, ccol) = track[-1]
-            # Find neighbouring cells that are walls
-            neighbours = self.find_neighbours(crow, ccol, grid, True)
-
-            # If no unvisited neighbouring cells, backtrack
-            if len(neighbours) == 0:
-                track = track[:-1]  # Remove the current cell from the track
+        while top >= 0:
+            # Get the current cell's index
+            current = track[top]
+            # Look at the neighbours in a fresh random order
+            if pos == len(draws):
+                draws = self.rng.integers(len(orders), min(PERMUTATION_BLOCK, remaining))
+                remaining -= len(draws)
+                pos = 0
+            order = orders[draws[pos]]
+            pos += 1
+            for wall, step in order:
+                # Take the first neighbouring cell that is still enclosed by walls
+                if cells[current + wall] == 1 and cells[current + step] == 1:
+                    # Mark the cell between current and chosen cell, and the chosen cell, as passage
+                    cells[current + wall] = 0
+                    cells[current + step] = 0
+                    if emit is not None:
+                        emit(current + wall, CARVE)
+                        emit(current + step, CARVE)
+                    # Move to the chosen neighbouring cell
+                    top += 1
+                    pushes += 1
+                    track[top] = current + step
+                    if top > peak:
+                        peak = top
+                    break
             else:
-                # Choose a random neighbouring cell and mark it as a passage
-                nrow, ncol = choice(neighbours)
-                grid[nrow][ncol] = 0
-                # Mark the cell between current and chosen cell as passage
-                grid[(nrow + crow) // 2][(ncol + ccol) // 2] = 0
-                # Move to the chosen neighbouring cell
-                track.append((nrow, ncol))
+                # If no unvisited neighbouring cells, backtrack
+                top -= 1
+                pops += 1
+                if emit is not None:
+                    emit(current, RETREAT)
 
+        self.mark_border(grid, 1)
+        # The starting cell, then a wall and a cell for every push
+        self.counters = {"cells_carved": 1 + 2 * pushes, "cells_visited": 1 + pushes, "backtracks": pops,
+                         "peak_stack": peak + 1}
         return grid
@@ -1,6 +1,5 @@
-from random import choice
-
 from SolveAlgo import solveAlgo
+from events import VISIT
 
 class BacktrackingSolver(solveAlgo):
     def _solve(self):
@@ -9,11 +8,15 @@ class BacktrackingSolver(solveAlgo):
         # Start from the beginning of the maze
         current = self.start
         solution.append(current)
+        queries = 0  # Number of neighbour lookups made
+        width = self.grid.shape[1]
+        emit = None if self.events is None else self.events.emit
 
         # Continue until the current position is one cell away from the end
         while not self.one_away(solution[-1], self.end):
             # Get available neighbouring cells of the current position
             ns = self.available_neighbours(solution[-1])
+            queries += 1
 
             # If there are multiple available neighbours and the solution has progressed
             if len(ns) > 1 and len(solution) > 2:
@@ -27,12 +30,15 @@ class BacktrackingSolver(solveAlgo):
                 break
 
             # Choose a random neighbouring cell to move to
-            nxt = choice(ns)
+            nxt = self.rng.choice(ns)
             # Add the cell midway between the current cell and the chosen cell
             solution.append(self.midway(solution[-1], nxt))
             # Add the chosen cell to the solution path
             solution.append(nxt)
+            if emit is not None:
+                emit(nxt[0] * width + nxt[1], VISIT)
 
+        self.counters = {"steps": (len(solution) - 1) // 2, "neighbour_queries": queries}
         # Return the solution path
         return [solution]
 
@@ -0,0 +1,71 @@
+import numpy as np
+
+from SolveAlgo import solveAlgo
+from adjacency import flat_neighbour_offsets
+from disjoint_set import index_dtype
+from events import VISIT
+
+class BidirectionalBFS(solveAlgo):
+    # Breadth-first search from both ends at once, always growing the smaller frontier
+
+    def _solve(self):
+        width = self.grid.shape[1]
+        steps = flat_neighbour_offsets(width)
+        open_directions = memoryview(self.adjacency.reshape(-1))
+        start = self.start[0] * width + self.start[1]
+        end = self.end[0] * width + self.end[1]
+        if start == end:
+            return [[]]
+
+        # Distance of every cell from each end (-1 = not reached) and the cell it was reached from
+        dtype = index_dtype(self.grid.size)
+        sides = []
+        for name, origin in (("forward", start), ("backward", end)):
+            distances = self.overlay(name + "_distances", np.int32, -1)
+            parents = self.overlay(name + "_parents", dtype, -1)
+            distance = memoryview(distances.reshape(-1))
+            distance[origin] = 0
+            sides.append((distance, memoryview(parents.reshape(-1)), [origin]))
+
+        meeting = -1
+        expanded = 0
+        emit = None if self.events is None else self.events.emit
+        while meeting < 0 and sides[0][2] and sides[1][2]:
+            # Grow the side with the smaller frontier by one whole level
+            k = 0 if len(sides[0][2]) <= len(sides[1][2]) else 1
+            distance, parent, frontier = sides[k]
+            other = sides[1 - k][0]
+            best = -1
+            grown = []
+            for current in frontier:
+                d = distance[current] + 1
+                for step in steps[open_directions[current]]:
+                    n = current + step
+                    if distance[n] >= 0:
+                        continue
+                    distance[n] = d
+                    parent[n] = current
+                    grown.append(n)
+                    if emit is not None:
+                        emit(n, VISIT)
+                    # Keep the shortest of the routes meeting the other side on this level
+                    if other[n] >= 0 and (best < 0 or d + other[n] < best):
+                        best = d + other[n]
+                        meeting = n
+            sides[k] = (distance, parent, grown)
+            expanded += len(frontier)
+        self.counters = {"cells_expanded": expanded}
+
+        if meeting < 0:
+            # The frontiers never met, so the end cannot be reached from the start
+            return []
+
+        # Join the route back to the start with the route on to the end
+        cells = [meeting]
+        forward, backward = sides[0][1], sides[1][1]
+        while cells[-1] != start:
+            cells.append(forward[cells[-1]])
+        cells.reverse()
+        while cells[-1] != end:
+            cells.append(backward[cells[-1]])
+        return [self.flat_path(cells)]
@@ -1,11 +1,10 @@
 import numpy as np
-from random import choice
 
 from GenAlgo import genAlgo
 
 class BinaryTree(genAlgo):
-    def __init__(self, w, h, skew=None):
-        super(BinaryTree, self).__init__(w, h)
+    def __init__(self, w, h, skew=None, factory=None, seed=None):
+        super(BinaryTree, self).__init__(w, h, factory=factory, seed=seed)
         # Define skew options for biasing the maze generation direction
         skewes = {
             "NW": [(1, 0), (0, -1)],
@@ -17,42 +16,63 @@ class BinaryTree(genAlgo):
         if skew in skewes:
             self.skew = skewes[skew]
         else:
-            key = choice(list(skewes.keys()))
+            key = self.rng.choice(list(skewes.keys()))
             self.skew = skewes[key]
 
     def generate(self):
-        # Create an empty array grid of dimensions HxW filled with walls (1s)
-        grid = np.empty((self.H, self.W), dtype=np.int8)
+        # Create an empty grid of dimensions HxW filled with walls (1s)
+        grid = self.empty_grid()
+        # Every cell only looks at its own neighbours, so the grid can be carved a block of rows
+        # at a time; a disk-backed grid is then written front to back
+        rows = self.chunk_rows()
+        for top in range(0, self.h, rows):
+            bottom = min(self.h, top + rows)
+            self.carve_rows(grid[None], top, bottom)
+            # Walls carved south of the block are reported with the next block
+            self.emit_carved(grid, 2 * top, 2 * bottom if bottom < self.h else self.H)
+        return grid
+
+    def generate_batch(self, n):
+        if n <= 0:
+            raise ValueError(f"Batch size must be a positive integer, got n={n}")
+        n = int(n)
+        # Create a stack of n grids of dimensions HxW filled with walls (1s)
+        grid = np.empty((n, self.H, self.W), dtype=np.int8)
         grid.fill(1)
+        self.carve_rows(grid, 0, self.h)
+        return grid
 
-        # Iterate over every second row and column in the grid
-        for row in range(1, self.H, 2):
-            for col in range(1, self.W, 2):
-                # Carve out passages at every second row and column
-                grid[row][col] = 0
-                # Find the neighbouring cell according to the skew
-                neighbour_row, neighbour_col = self.find_neighbour(row, col)
-                # Carve out a passage at the neighbouring cell
-                grid[neighbour_row][neighbour_col] = 0
+    def carve_rows(self, grid, top, bottom):
+        # Carve cell rows top..bottom-1 of every grid in a stack of grids
+        n = grid.shape[0]
+        # Carve out passages at every second row and column
+        grid[:, 2 * top + 1:2 * bottom:2, 1::2] = 0
 
-        return grid
+        # Work out which cells can carve in each of the two skew directions
+        (a_row, a_col), (b_row, b_col) = self.skew
+        valid_a = self.valid_cells(a_row, a_col, top, bottom)
+        valid_b = self.valid_cells(b_row, b_col, top, bottom)
 
-    def find_neighbour(self, current_row, current_col):
-        # Initialize a list to store neighbouring cell coordinates
-        neighbours = []
-        # Iterate over each skew direction
-        for b_row, b_col in self.skew:
-            # Calculate the coordinates of the neighbouring cell
-            neighbour_row = current_row + b_row
-            neighbour_col = current_col + b_col
-            # Check if the neighbouring cell is within the bounds of the grid
-            if 0 < neighbour_row < (self.H - 1) and 0 < neighbour_col < (self.W - 1):
-                # Add the neighbouring cell coordinates to the list
-                neighbours.append((neighbour_row, neighbour_col))
-
-        # If there are no valid neighbouring cells, return the current cell
-        if len(neighbours) == 0:
-            return (current_row, current_col)
-        else:
-            # Choose one of the valid neighbouring cells randomly and return its coordinates
-            return choice(neighbours)
+        # Draw every coin flip for every cell of every maze at once
+        coin = self.rng.floats((n, bottom - top, self.w)) < 0.5
+        # Use the first direction when it is the only option or the coin says so
+        carve_a = valid_a & (coin | ~valid_b)
+        # Otherwise fall back to the second direction where it is available
+        carve_b = valid_b & ~carve_a
+
+        # Knock down the wall next to each cell in the chosen direction
+        grid[:, self.wall_slice(a_row, bottom, top), self.wall_slice(a_col, self.w)][carve_a] = 0
+        grid[:, self.wall_slice(b_row, bottom, top), self.wall_slice(b_col, self.w)][carve_b] = 0
+
+    def valid_cells(self, b_row, b_col, top=0, bottom=None):
+        # Mark the cells of rows top..bottom-1 whose neighbour in the given direction lies inside the grid
+        bottom = self.h if bottom is None else bottom
+        rows = np.arange(2 * top + 1, 2 * bottom, 2) + b_row
+        cols = np.arange(1, self.W, 2) + b_col
+        valid_rows = (rows > 0) & (rows < self.H - 1)
+        valid_cols = (cols > 0) & (cols < self.W - 1)
+        return valid_rows[:, None] & valid_cols[None, :]
+
+    def wall_slice(self, offset, stop, start=0):
+        # Slice selecting, for cells start..stop-1 along one axis, the grid line offset from them
+        return slice(2 * start + 1 + offset, 2 * stop + offset, 2)
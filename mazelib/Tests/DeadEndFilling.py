@@ -0,0 +1,58 @@
+from collections import deque
+
+import numpy as np
+
+from SolveAlgo import solveAlgo
+from adjacency import flat_neighbour_offsets
+from disjoint_set import index_dtype
+from events import VISIT
+
+class DeadEndFilling(solveAlgo):
+    # Fill in every dead end of the maze at once, wave after wave, then read off what is left
+
+    def __init__(self, seed=None, prune=True):
+        # Dead-end filling is exactly the pruning pass every solver can opt into, so it always
+        # prunes; prune=True is accepted so solvers can be built generically
+        if not prune:
+            raise ValueError("DeadEndFilling always prunes dead ends, got prune=False")
+        super(DeadEndFilling, self).__init__(seed, prune=True)
+
+    def _solve(self):
+        width = self.grid.shape[1]
+        steps = flat_neighbour_offsets(width)
+        open_directions = memoryview(self.adjacency.reshape(-1))
+        start = self.start[0] * width + self.start[1]
+        end = self.end[0] * width + self.end[1]
+
+        # In a perfect maze only the corridor from start to end is left, so this search
+        # just follows it; loops that survived the filling are settled breadth-first
+        parents = self.overlay("parents", index_dtype(self.grid.size), -1)
+        parent = memoryview(parents.reshape(-1))
+        parent[start] = start
+        queue = deque([start])
+        expanded = 0
+        emit = None if self.events is None else self.events.emit
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            if current == end:
+                break
+            for step in steps[open_directions[current]]:
+                n = current + step
+                if parent[n] < 0:
+                    parent[n] = current
+                    queue.append(n)
+                    if emit is not None:
+                        emit(n, VISIT)
+        else:
+            # The end cannot be reached from the start
+            self.counters = {"cells_expanded": expanded}
+            return []
+        self.counters = {"cells_expanded": expanded}
+
+        # Follow the parents back from the end
+        cells = [end]
+        while cells[-1] != start:
+            cells.append(parent[cells[-1]])
+        cells.reverse()
+        return [self.flat_path(cells)]
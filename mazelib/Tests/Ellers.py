@@ -1,109 +1,148 @@
-from random import choice, random
 import numpy as np
 
 from GenAlgo import genAlgo
+from disjoint_set import DisjointSet, index_dtype
 
 class Ellers(genAlgo):
-    def __init__(self, w, h, xskew=0.5, yskew=0.5):
-        super(Ellers, self).__init__(w, h)
-        # Initialize x and y skew factors
+    def __init__(self, w, h, xskew=0.5, yskew=0.5, d=None, zskew=0.5, factory=None, seed=None):
+        super(Ellers, self).__init__(w, h, d, factory, seed)
+        # Initialize x, y and z (depth, 3D mazes only) skew factors
         self.xskew = 0.0 if xskew < 0.0 else 1.0 if xskew > 1.0 else xskew
         self.yskew = 0.0 if yskew < 0.0 else 1.0 if yskew > 1.0 else yskew
+        self.zskew = 0.0 if zskew < 0.0 else 1.0 if zskew > 1.0 else zskew
 
     def generate(self):
-        # Initialize sets array with dimensions HxW filled with -1
-        sets = np.empty((self.H, self.W), dtype=np.int8)
-        sets.fill(-1)
+        # 3D mazes are built a whole layer at a time
+        if self.d is not None:
+            return self.generate_layers()
 
-        # Initialize max_set_number to track the maximum set number
-        max_set_number = 0
+        # Create an empty grid of dimensions HxW filled with walls (1s); rows are carved
+        # top to bottom straight into it, so a disk-backed grid is written sequentially
+        grid = self.empty_grid()
+        # Only the set labels of the current row are kept, renumbered to 0..w-1 every row
+        labels = np.arange(self.w, dtype=index_dtype(self.w))
 
         # Loop through every second row starting from the second row
-        for r in range(1, self.H - 1, 2):
-            # Initialize the current row with set numbers
-            max_set_number = self.init_row(sets, r, max_set_number)
+        for r in range(1, self.H - 2, 2):
+            # Carve out the cells of the current row
+            grid[r, 1::2] = 0
+            # Every row starts with a fresh union-find structure over its labels
+            self.dsu = DisjointSet(self.w)
             # Merge cells in the current row horizontally
-            self.merge_one_row(sets, r)
-            # Merge cells in the next row downward
-            self.merge_down_a_row(sets, r)
+            self.merge_one_row(grid, r, labels)
+            # Merge cells in the next row downward and label the row below
+            labels = self.merge_down_a_row(grid, r, labels)
+            self.emit_carved(grid, r, r + 2)
 
-        # Initialize the last row with set numbers
-        max_set_number = self.init_row(sets, self.H - 2, max_set_number)
         # Process the last row to merge remaining sets
-        self.process_last_row(sets)
+        grid[self.H - 2, 1::2] = 0
+        self.dsu = DisjointSet(self.w)
+        self.process_last_row(grid, labels)
+        self.emit_carved(grid, self.H - 2, self.H - 1)
 
-        # Convert sets array to grid
-        return self.grid_from_sets(sets)
-
-    def init_row(self, sets, row, max_set_number):
-        # Initialize sets in the given row with set numbers
-        for c in range(1, self.W, 2):
-            if sets[row][c] < 0:
-                sets[row][c] = max_set_number
-                max_set_number += 1
-        return max_set_number
+        return grid
 
-    def merge_one_row(self, sets, r):
+    def init_row(self, roots, down):
+        # Label the row below: cells reached from above keep their set (renumbered from 0),
+        # every other cell gets a fresh set of its own
+        labels = np.empty(self.w, dtype=index_dtype(self.w))
+        _, carried = np.unique(roots[down], return_inverse=True)
+        labels[down] = carried
+        count = int(carried.max()) + 1 if len(carried) else 0
+        labels[~down] = np.arange(count, count + self.w - len(carried))
+        return labels
+
+    def merge_one_row(self, grid, r, labels):
         # Merge cells in the given row horizontally with a given skew factor
-        for c in range(1, self.W - 2, 2):
-            if random() < self.xskew:
-                if sets[r][c] != sets[r][c + 2]:
-                    sets[r][c + 1] = sets[r][c]
-                    self.merge_sets(sets, sets[r][c + 2], sets[r][c], max_row=r)
-
-    def merge_down_a_row(self, sets, start_row):
-        # Merge cells in the row below the given start row with a given skew factor
-        if start_row == self.H - 2:  # Not meant for the bottom row
-            return
-        # Count how many cells of each set exist in a row
-        set_counts = {}
-        for c in range(1, self.W, 2):
-            s = sets[start_row][c]
-            if s not in set_counts:
-                set_counts[s] = [c]
-            else:
-                set_counts[s] = set_counts[s] + [c]
+        labels = labels.tolist()
+        for c in np.flatnonzero(self.rng.floats(self.w - 1) < self.xskew).tolist():
+            # Only knock the wall down if the two cells are not already connected
+            if self.dsu.union(labels[c], labels[c + 1]):
+                grid[r, 2 * c + 2] = 0
+
+    def merge_down_a_row(self, grid, r, labels):
+        # Merge cells in the row below the given row with a given skew factor
+        roots = self.dsu.roots()[labels]
+        # Group the columns of the row by the set they belong to
+        order = np.argsort(roots, kind="stable")
+        sorted_roots = roots[order]
+        starts = np.flatnonzero(np.r_[True, sorted_roots[1:] != sorted_roots[:-1]])
+        ends = np.r_[starts[1:], self.w]
 
+        # Merge cells downward with a given skew factor
+        down = np.zeros(self.w, dtype=bool)
+        down[:-1] = self.rng.floats(self.w - 1) < self.yskew
         # Merge down randomly, but at least once per set
-        for s in set_counts:
-            c = choice(set_counts[s])
-            sets[start_row + 1][c] = s
-            sets[start_row + 2][c] = s
+        down[order[starts + (self.rng.floats(len(starts)) * (ends - starts)).astype(np.int64)]] = True
+        grid[r + 1, 2 * np.flatnonzero(down) + 1] = 0
 
-        # Merge cells downward with a given skew factor
-        for c in range(1, self.W - 2, 2):
-            if random() < self.yskew:
-                s = sets[start_row][c]
-                if sets[start_row + 1][c] == -1:
-                    sets[start_row + 1][c] = s
-                    sets[start_row + 2][c] = s
-
-    def merge_sets(self, sets, from_set, to_set, max_row=-1):
-        # Merge sets from one to another within the specified row range
-        if max_row < 0:
-            max_row = self.H - 1
-
-        for r in range(1, max_row + 1):
-            for c in range(1, self.W - 1):
-                if sets[r][c] == from_set:
-                    sets[r][c] = to_set
-
-    def process_last_row(self, sets):
+        return self.init_row(roots, down)
+
+    def process_last_row(self, grid, labels):
         # Process the last row to merge remaining sets
         r = self.H - 2
-        for c in range(1, self.W - 2, 2):
-            if sets[r][c] != sets[r][c + 2]:
-                sets[r][c + 1] = sets[r][c]
-                self.merge_sets(sets, sets[r][c + 2], sets[r][c])
-
-    def grid_from_sets(self, sets):
-        # Convert sets array to grid
-        grid = np.empty((self.H, self.W), dtype=np.int8)
-        grid.fill(0)
-
-        for r in range(self.H):
-            for c in range(self.W):
-                if sets[r][c] == -1:
-                    grid[r][c] = 1
-
+        labels = labels.tolist()
+        for c in range(self.w - 1):
+            if self.dsu.union(labels[c], labels[c + 1]):
+                grid[r, 2 * c + 2] = 0
+
+    def generate_layers(self):
+        # Eller's algorithm one layer deeper: each layer plays the part of a row. Cells are
+        # merged east (xskew) and south (yskew) inside the layer, then every set carves down
+        # into the next layer at least once (more often with zskew). Only the current layer's
+        # sets are kept, so memory beyond the grid is proportional to one layer.
+        grid = self.empty_grid()
+        # Carve out every cell; only walls are decided below
+        grid[1::2, 1::2, 1::2] = 0
+        n = self.h * self.w
+        east, south = self.layer_edges()
+        carried = None
+
+        for k in range(self.d):
+            layer = grid[2 * k + 1].reshape(-1)
+            dsu = DisjointSet(n)
+            # Cells reached from the layer above arrive already connected to each other
+            if carried is not None:
+                for a, b in zip(*carried):
+                    dsu.union(a, b)
+
+            # Pick the in-layer walls to try; the last layer must join every remaining set
+            last = k == self.d - 1
+            edges = [e if last else e[:, self.rng.floats(e.shape[1]) < skew]
+                     for e, skew in ((east, self.xskew), (south, self.yskew))]
+            edges = np.concatenate(edges, axis=1)
+            edges = edges[:, self.rng.permutation(edges.shape[1])]
+            carved = [wall for a, b, wall in edges.T.tolist() if dsu.union(a, b)]
+            layer[carved] = 0
+            if last:
+                break
+
+            # Carve down from one random cell of every set, plus extra cells with zskew
+            roots = dsu.roots()
+            order = np.argsort(roots, kind="stable")
+            sorted_roots = roots[order]
+            starts = np.flatnonzero(np.r_[True, sorted_roots[1:] != sorted_roots[:-1]])
+            ends = np.r_[starts[1:], n]
+            down = self.rng.floats(n) < self.zskew
+            down[order[starts + (self.rng.floats(len(starts)) * (ends - starts)).astype(np.int64)]] = True
+            cells = np.flatnonzero(down)
+            rows, cols = np.divmod(cells, self.w)
+            grid[2 * k + 2, 2 * rows + 1, 2 * cols + 1] = 0
+
+            # Remember which of the cells below share a set
+            cells = cells[np.argsort(roots[cells], kind="stable")]
+            same = roots[cells[1:]] == roots[cells[:-1]]
+            carried = (cells[:-1][same].tolist(), cells[1:][same].tolist())
+
+        # Layers are carved in array operations, so the whole volume is reported at the end
+        self.emit_carved(grid, 0, self.D)
         return grid
+
+    def layer_edges(self):
+        # Every wall inside a layer as a (cell, cell, flat wall position in the layer) column
+        cells = np.arange(self.h * self.w).reshape(self.h, self.w)
+        rows, cols = np.divmod(cells, self.w)
+        walls = (2 * rows + 1) * self.W + 2 * cols + 1
+        east = np.stack([cells[:, :-1].ravel(), cells[:, 1:].ravel(), walls[:, :-1].ravel() + 1])
+        south = np.stack([cells[:-1, :].ravel(), cells[1:, :].ravel(), walls[:-1, :].ravel() + self.W])
+        return east, south
@@ -9,14 +9,16 @@ Base class for maze generation algorithms.
 This module provides the base class that all maze generation algorithms inherit from.
 """
 import numpy as np
-from numpy.random import shuffle
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
+from events import CARVE
+from rng import RandomBuffer, Seed
 try:
-    from constants import WALL_MULTIPLIER, WALL_OFFSET
+    from constants import WALL_MULTIPLIER, WALL_OFFSET, GENERATION_CHUNK_BYTES
 except ImportError:
     # Fallback if constants module is not available
     WALL_MULTIPLIER = 2
     WALL_OFFSET = 1
+    GENERATION_CHUNK_BYTES = 1 << 24
 
 
 class genAlgo:
@@ -26,33 +28,181 @@ class genAlgo:
     This class provides common functionality for maze generators, including
     neighbor finding and grid dimension calculations.
     
+    Generators that support a depth dimension build (D, H, W) volumes
+    instead of (H, W) grids; cells sit at odd coordinates along every axis
+    and neighbouring cells are two steps apart along one axis.
+    
+    Large arrays are obtained from ``allocate``, which defers to an
+    optional array factory such as ``utils.memmap_factory``, so a
+    generator can write its grid straight into a disk-backed array.
+    
+    All randomness comes from the generator's own ``rng``, so a generator
+    built with the same seed always produces the same mazes.
+    
     Attributes:
         h (int): Height of the maze (number of cells)
         w (int): Width of the maze (number of cells)
+        d (int): Depth of the maze (number of cells), None for a 2D maze
         H (int): Height of the grid including walls
         W (int): Width of the grid including walls
+        D (int): Depth of the grid including walls, None for a 2D maze
+        shape (tuple): Shape of the grid, (H, W) or (D, H, W)
+        factory (callable): Called with (shape, dtype) to create large
+            arrays, None to allocate them in memory
+        rng (RandomBuffer): Source of every random decision the generator makes
+        counters (dict): Work counters of the last ``generate`` call, filled
+            in by generators that track any (see stats.py)
+        events (EventStream): Receives a CARVE event for every position
+            ``generate`` carves, in the order it is carved (see events.py),
+            None to record nothing
     """
     
-    def __init__(self, h: int, w: int) -> None:
+    def __init__(self, h: int, w: int, d: Optional[int] = None,
+                 factory: Optional[Callable[[Tuple[int, ...], type], np.ndarray]] = None,
+                 seed: Seed = None) -> None:
         """
         Initialize the maze generator with given dimensions.
         
         Args:
             h: Height of the maze (must be positive)
             w: Width of the maze (must be positive)
+            d: Depth of the maze (must be positive), None for a 2D maze
+            factory: Called with (shape, dtype) to create the grid and other
+                large arrays, None to allocate them in memory
+            seed: Seed or np.random.Generator for the generator's random
+                source, None for fresh OS entropy
             
         Raises:
             ValueError: If dimensions are not positive integers
         """
         # Validate maze dimensions
-        if h <= 0 or w <= 0:
-            raise ValueError(f"Maze dimensions must be positive integers, got h={h}, w={w}")
+        if h <= 0 or w <= 0 or (d is not None and d <= 0):
+            raise ValueError(f"Maze dimensions must be positive integers, got h={h}, w={w}, d={d}")
         # Initialize maze dimensions
         self.h = int(h)
         self.w = int(w)
+        self.d = None if d is None else int(d)
         # Calculate grid dimensions with walls included
         self.H = (WALL_MULTIPLIER * self.h) + WALL_OFFSET
         self.W = (WALL_MULTIPLIER * self.w) + WALL_OFFSET 
+        self.D = None if d is None else (WALL_MULTIPLIER * self.d) + WALL_OFFSET
+        self.shape = (self.H, self.W) if d is None else (self.D, self.H, self.W)
+        self.factory = factory
+        self.rng = RandomBuffer(seed)
+        self.counters = {}
+        self.events = None
+
+    def num_cells(self) -> int:
+        """
+        Number of cells in the maze.
+        
+        Returns:
+            h * w, times d for a 3D maze
+        """
+        return self.h * self.w * (1 if self.d is None else self.d)
+
+    def allocate(self, shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+        """
+        Allocate an uninitialised array through the generator's factory.
+        
+        Args:
+            shape: Shape of the array
+            dtype: NumPy dtype of the array
+            
+        Returns:
+            The factory's array, or a new in-memory array if there is no factory
+        """
+        if self.factory is None:
+            return np.empty(shape, dtype=dtype)
+        return self.factory(tuple(shape), dtype)
+
+    def empty_grid(self) -> np.ndarray:
+        """
+        Allocate a grid of the generator's shape filled with walls (1s).
+        
+        Returns:
+            An int8 array of shape (H, W) or (D, H, W)
+        """
+        grid = self.allocate(self.shape, np.int8)
+        grid.fill(1)
+        return grid
+
+    def chunk_rows(self) -> int:
+        """
+        Number of cell rows to generate at a time in row-ordered generators.
+        
+        Blocks are sized to roughly GENERATION_CHUNK_BYTES of grid, so
+        temporary arrays stay small and disk-backed grids are written
+        sequentially, a few pages at a time.
+        
+        Returns:
+            Number of cell rows per block (at least 1)
+        """
+        return max(1, GENERATION_CHUNK_BYTES // (WALL_MULTIPLIER * self.W))
+
+    def emit_carved(self, grid: np.ndarray, start: int, stop: int) -> None:
+        """
+        Record a CARVE event for every passage in a block of the grid.
+        
+        Generators that carve whole blocks at once with array operations
+        report each block this way once it is finished.
+        
+        Args:
+            grid: Grid of the generator's shape
+            start: First row (first layer of a 3D grid) of the block
+            stop: Row (layer) just past the block
+        """
+        if self.events is None:
+            return
+        # Flat index of the block's first position
+        offset = start * (grid.size // grid.shape[0])
+        self.events.extend(np.flatnonzero(grid[start:stop] == 0) + offset, CARVE)
+
+    def flat_strides(self) -> Tuple[int, ...]:
+        """
+        Flat-index distance between neighbouring grid positions along every axis.
+        
+        Returns:
+            Tuple with one stride per axis of the grid, outermost axis first
+        """
+        strides = [1]
+        for size in reversed(self.shape[1:]):
+            strides.insert(0, strides[0] * size)
+        return tuple(strides)
+
+    def flat_offsets(self) -> List[Tuple[int, int]]:
+        """
+        Flat-index (wall, neighbour) offsets for every direction a cell can carve in.
+        
+        Returns:
+            List of (wall offset, neighbour offset) pairs: North, South, East,
+            West, followed by Up and Down for a 3D maze
+        """
+        strides = self.flat_strides()
+        row, col = strides[-2], strides[-1]
+        offsets = [(-row, -2 * row), (row, 2 * row), (col, 2 * col), (-col, -2 * col)]
+        if self.d is not None:
+            layer = strides[0]
+            offsets += [(-layer, -2 * layer), (layer, 2 * layer)]
+        return offsets
+
+    def mark_border(self, grid: np.ndarray, value: int) -> None:
+        """
+        Set every position on the outer wall of the grid to the given value.
+        
+        Generators mark the border with a sentinel while they work so that
+        flat-index steps never need a bounds check.
+        
+        Args:
+            grid: Grid of the generator's shape
+            value: Value to write
+        """
+        for axis in range(grid.ndim):
+            index = [slice(None)] * grid.ndim
+            index[axis] = 0
+            grid[tuple(index)] = value
+            index[axis] = -1
+            grid[tuple(index)] = value
 
     def generate(self) -> np.ndarray:
         """
@@ -61,10 +211,34 @@ class genAlgo:
         This is a placeholder method that should be implemented in subclasses.
         
         Returns:
-            A 2D numpy array representing the maze grid (1 = wall, 0 = passage)
+            A numpy array of shape (H, W) or (D, H, W) representing the maze
+            grid (1 = wall, 0 = passage)
         """
         return None
 
+    def generate_batch(self, n: int) -> np.ndarray:
+        """
+        Generate a stack of independent maze grids.
+
+        Generators that can draw every carve decision at once override this
+        method; the default simply calls ``generate`` once per maze.
+
+        Args:
+            n: Number of mazes to generate (must be positive)
+
+        Returns:
+            A numpy array of shape (n, H, W) or (n, D, H, W) with one maze per slice
+
+        Raises:
+            ValueError: If n is not a positive integer
+        """
+        if n <= 0:
+            raise ValueError(f"Batch size must be a positive integer, got n={n}")
+        batch = np.empty((int(n),) + self.shape, dtype=np.int8)
+        for i in range(int(n)):
+            batch[i] = self.generate()
+        return batch
+
     def find_neighbours(self, r: int, c: int, grid: np.ndarray, is_wall: bool = False) -> List[Tuple[int, int]]:
         """
         Find neighboring cells with a given condition (e.g., being a wall).
@@ -97,5 +271,5 @@ class genAlgo:
             ns.append((r, c + 2))
 
         # Shuffle the list of neighbouring cells randomly
-        shuffle(ns)
+        self.rng.shuffle(ns)
         return ns
@@ -1,6 +1,11 @@
-from random import choice  # Import the choice function for random selection
+import numpy as np
 
 from SolveAlgo import solveAlgo  # Import the SolveAlgo class
+from adjacency import DEGREE, NEIGHBOUR_OFFSETS
+from events import VISIT
+
+# Number of lockstep moves whose random numbers are drawn at a time in ensemble mode
+ENSEMBLE_BLOCK = 64
 
 class RandomMouse(solveAlgo):
 
@@ -10,19 +15,96 @@ class RandomMouse(solveAlgo):
         current = self.start
         # Add the starting position to the solution path
         solution.append(current)
+        queries = 0  # Number of neighbour lookups made
+        width = self.grid.shape[1]
+        emit = None if self.events is None else self.events.emit
         # Continue until the mouse reaches the end of the maze
         while not self.one_away(solution[-1], self.end):
             # Find available neighbours for the current position
             ns = self.available_neighbours(solution[-1])
+            queries += 1
             # Check if there are any available neighbours
             if len(ns) == 0:
                 # No path available, return current solution
                 break
             # Randomly select the next position from the available neighbours
-            nxt = choice(ns)
+            nxt = self.rng.choice(ns)
             # Add the midpoint between the current position and the next position to the solution
             solution.append(self.midway(solution[-1], nxt))
             # Add the next position to the solution
             solution.append(nxt)
+            if emit is not None:
+                emit(nxt[0] * width + nxt[1], VISIT)
+        self.counters = {"steps": (len(solution) - 1) // 2, "neighbour_queries": queries}
         # Return the solution path
         return [solution]
+
+    def ensemble(self, grid, start, end, mice, max_steps=None, heatmap=False, adjacency=None):
+        # Run many independent mice on the same maze at once. Every mouse is a flat cell id in
+        # one NumPy array and all of them move in lockstep: a cell's open-direction mask picks
+        # its row of neighbour jumps and a uniform float picks the column. Returns the number of
+        # moves every mouse took to reach the end (-1 if it did not within max_steps) and, if
+        # asked, how often each cell was occupied, as an (h, w) array of counts.
+        self.maze_load(grid, start, end, adjacency)
+        H, W = self.grid.shape
+        h, w = H // 2, W // 2
+        masks = np.ascontiguousarray(self.adjacency[1:H - 1:2, 1:W - 1:2]).reshape(-1)
+        # Cell id jumps for every mask, padded to four columns
+        jumps = np.zeros((16, 4), dtype=np.int64)
+        for mask, offsets in enumerate(NEIGHBOUR_OFFSETS):
+            jumps[mask, :len(offsets)] = [(dr // 2) * w + dc // 2 for dr, dc in offsets]
+        degrees = DEGREE.astype(np.float64)
+
+        first = (start[0] // 2) * w + start[1] // 2
+        goal = (end[0] // 2) * w + end[1] // 2
+        steps = np.full(mice, -1, dtype=np.int64)
+        heat = np.zeros(h * w, dtype=np.int64) if heatmap else None
+        if heatmap:
+            heat[first] += mice
+        if first == goal:
+            steps[:] = 0
+        elif max_steps is None and not self.reachable(masks, jumps, first, goal):
+            # Without a step limit, mice that can never arrive would walk forever
+            max_steps = 0
+
+        position = np.full(mice, first, dtype=np.int64)
+        ids = np.arange(mice)
+        t = 0
+        while len(position) and first != goal and (max_steps is None or t < max_steps):
+            block = ENSEMBLE_BLOCK if max_steps is None else min(ENSEMBLE_BLOCK, max_steps - t)
+            draws = self.rng.floats((block, len(position)))
+            visited = []
+            for i in range(block):
+                # Move every mouse to a uniformly chosen open neighbour
+                mask = masks[position]
+                choice = (draws[i, :len(position)] * degrees[mask]).astype(np.int64)
+                position = position + jumps[mask, choice]
+                t += 1
+                if heatmap:
+                    visited.append(position)
+                arrived = position == goal
+                if arrived.any():
+                    # Mice that reach the end stop there
+                    steps[ids[arrived]] = t
+                    position, ids = position[~arrived], ids[~arrived]
+                    if not len(position):
+                        break
+            if heatmap and visited:
+                heat += np.bincount(np.concatenate(visited), minlength=h * w)
+
+        return steps, (heat.reshape(h, w) if heatmap else None)
+
+    def reachable(self, masks, jumps, first, goal):  # Breadth-first search over cell ids
+        table = [row[:DEGREE[mask]] for mask, row in enumerate(jumps.tolist())]
+        open_directions = memoryview(masks)
+        seen = np.zeros(len(masks), dtype=bool)
+        marks = memoryview(seen)
+        marks[first] = True
+        frontier = [first]
+        for cell in frontier:
+            for jump in table[open_directions[cell]]:
+                n = cell + jump
+                if not marks[n]:
+                    marks[n] = True
+                    frontier.append(n)
+        return bool(seen[goal])
@@ -1,96 +1,114 @@
-from SolveAlgo import solveAlgo  # Import the solveAlgo class
-
-class ShortestPath(solveAlgo):
-    # ShortestPaths class inherits from solveAlgo class
-   
-    def _solve(self):
-        
-        start = self.start
+from collections import deque
+from itertools import islice
 
-        # Find available neighbour positions from the start position
-        start_posis = self.available_neighbours(start)
-        solutions = []
-        # Iterate through possible start positions
-        for sp in start_posis:
-            solutions.append([self.midway(start, sp), sp])
-
-        # Count the number of unfinished solutions
-        num_unfinished = len(solutions)
+import numpy as np
 
+from SolveAlgo import solveAlgo  # Import the solveAlgo class
+from events import VISIT
+try:
+    from constants import SHORTEST_PATH_LIMIT
+except ImportError:
+    # Fallback if constants module is not available
+    SHORTEST_PATH_LIMIT = 64
 
-        while num_unfinished > 0:
-            # Iterate through solutions
-            for s in range(len(solutions)):
-                # If the last position repeats or reaches the end position, mark it as None
-                if solutions[s][-1] in solutions[s][:-1]:
-                    solutions[s].append(None)
-                elif self.one_away(solutions[s][-1], self.end):
-                    solutions[s].append(None)
-                elif solutions[s][-1] is not None:
-                    # Check if we've reached the end (one cell away)
-                    if self.one_away(solutions[s][-1], self.end):
-                        solutions[s].append(None)
-                        continue
+class ShortestPath(solveAlgo):
+    # ShortestPath class inherits from solveAlgo class
 
-                    # Find available neighbour positions from the last position
-                    ns = self.available_neighbours(solutions[s][-1])
-                    ns = [n for n in ns if n not in solutions[s][-2:]]
+    def __init__(self, limit=SHORTEST_PATH_LIMIT, seed=None, prune=False):
+        super(ShortestPath, self).__init__(seed, prune)
+        # Maximum number of shortest paths returned by solve; None returns all of them, which
+        # is exponential in open or braided grids, so use count_paths for the total instead
+        self.limit = limit
 
-                    if len(ns) == 0:
-                        solutions[s].append(None)
-                    elif len(ns) == 1:
-                        solutions[s].append(self.midway(ns[0], solutions[s][-1]))
-                        solutions[s].append(ns[0])
-                    else:
-                        for j in range(1, len(ns)):
-                            nxt = [self.midway(ns[j], solutions[s][-1]), ns[j]]
-                            solutions.append(list(solutions[s]) + nxt)
-                        solutions[s].append(self.midway(ns[0], solutions[s][-1]))
-                        solutions[s].append(ns[0])
+    def _solve(self):
+        # Build the BFS distance field once, then read the paths off it
+        self.distance_field()
+        return list(self.iter_paths(self.limit))
 
-            # Update the number of unfinished solutions
-            num_unfinished = sum(map(lambda sol: 0 if sol[-1] is None else 1, solutions))
+    def distance_field(self):
+        # Breadth-first search from the start, recording the distance to every cell reached
+        distances = self.overlay("distances", np.int32, -1)
+        distances[self.start] = 0
+        queue = deque([self.start])
+        expanded = 0
+        width = self.grid.shape[1]
+        emit = None if self.events is None else self.events.emit
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            d = distances[current]
+            # Every cell on a shortest path to the end is labelled once the end's level is reached
+            if distances[self.end] >= 0 and d >= distances[self.end]:
+                break
+            for n in self.available_neighbours(current):
+                if distances[n] < 0:
+                    distances[n] = d + 1
+                    queue.append(n)
+                    if emit is not None:
+                        emit(n[0] * width + n[1], VISIT)
+        self.distances = distances
+        self.counters["cells_expanded"] = expanded
+        return distances
 
-        # Clean the solutions and remove duplicate solutions
-        solutions = self.clean(solutions)
-        return solutions
+    def predecessors(self, cell):
+        # Neighbours one step closer to the start form the edges of the shortest-path DAG
+        d = self.distances[cell] - 1
+        return [n for n in self.available_neighbours(cell) if self.distances[n] == d]
 
-    def clean(self, solutions):
-        # Method to clean up the solutions by removing unnecessary paths
-        
-        new_solutions = []
-        for sol in solutions:
-            if not sol or sol[-1] is None:
-                # Solution didn't reach the end, skip it
-                continue
-                
-            new_sol = list(sol)
-            
-            # Remove the None marker if present
-            if new_sol and new_sol[-1] is None:
-                new_sol = new_sol[:-1]
-            
-            # If solution ends one cell away from end, we might need to adjust
-            if len(new_sol) > 1 and self.one_away(new_sol[-1], self.end):
-                # Solution is valid, keep it
-                pass
-            elif len(new_sol) > 2 and self.one_away(new_sol[-2], self.end):
-                # Remove the last cell if it's not needed
-                new_sol = new_sol[:-1]
-            
-            # Remove end point if it's explicitly in the solution
-            if new_sol and new_sol[-1] == self.end:
-                new_sol = new_sol[:-1]
-                
-            if new_sol:
-                new_solutions.append(new_sol)
+    def count_paths(self):
+        # Count the shortest paths from start to end without enumerating them
+        if self.distances[self.end] < 0:
+            return 0
+        # Walk the DAG backwards from the end, one distance level at a time
+        levels = [[self.end]]
+        preds = {}
+        while levels[-1][0] != self.start:
+            level = {}
+            for cell in levels[-1]:
+                preds[cell] = self.predecessors(cell)
+                for p in preds[cell]:
+                    level[p] = True
+            levels.append(list(level))
+        # Then push the counts forwards from the start
+        counts = {self.start: 1}
+        for level in reversed(levels[:-1]):
+            for cell in level:
+                counts[cell] = sum(counts[p] for p in preds[cell])
+        return counts[self.end]
 
-        # Remove duplicate solutions
-        solutions = self.rem_dupe_sols(new_solutions)
+    def iter_paths(self, limit=None):
+        # Lazily yield the shortest paths, each one excluding the start and end cells
+        if self.distances[self.end] < 0:
+            return
+        paths = self.walk_dag()
+        yield from paths if limit is None else islice(paths, limit)
 
-        return sorted(solutions, key=len)
+    def walk_dag(self):
+        # Depth-first search backwards over the DAG; every branch leads back to the start
+        if self.end == self.start:
+            yield []
+            return
+        cells = [self.end]
+        stack = [iter(self.predecessors(self.end))]
+        while stack:
+            p = next(stack[-1], None)
+            if p is None:
+                # This branch is exhausted, go back up the DAG
+                stack.pop()
+                cells.pop()
+            elif p == self.start:
+                yield self.expand(cells)
+            else:
+                cells.append(p)
+                stack.append(iter(self.predecessors(p)))
 
-    def rem_dupe_sols(self, sols):
-        # Method to remove duplicate solutions
-        
-        return [list(s) for s in set(map(tuple, sols))]
+    def expand(self, cells):
+        # Turn a reversed list of cells (end first, start excluded) into a path with the walls in between
+        path = []
+        previous = self.start
+        for cell in reversed(cells):
+            path.append(self.midway(previous, cell))
+            if cell != self.end:
+                path.append(cell)
+            previous = cell
+        return path
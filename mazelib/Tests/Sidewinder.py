@@ -0,0 +1,67 @@
+import numpy as np
+
+from GenAlgo import genAlgo
+
+class Sidewinder(genAlgo):
+    def __init__(self, w, h, xskew=0.5, factory=None, seed=None):
+        super(Sidewinder, self).__init__(w, h, factory=factory, seed=seed)
+        # Probability of extending the current run east instead of closing it
+        self.xskew = 0.0 if xskew < 0.0 else 1.0 if xskew > 1.0 else xskew
+
+    def generate(self):
+        # Create an empty grid of dimensions HxW filled with walls (1s)
+        grid = self.empty_grid()
+        # Runs never span two rows, so the grid can be carved a block of rows at a time;
+        # a disk-backed grid is then written front to back
+        rows = self.chunk_rows()
+        for top in range(0, self.h, rows):
+            bottom = min(self.h, top + rows)
+            self.carve_rows(grid[None], top, bottom)
+            self.emit_carved(grid, 2 * top, 2 * bottom if bottom < self.h else self.H)
+        return grid
+
+    def generate_batch(self, n):
+        if n <= 0:
+            raise ValueError(f"Batch size must be a positive integer, got n={n}")
+        n = int(n)
+        # Create a stack of n grids of dimensions HxW filled with walls (1s)
+        grid = np.empty((n, self.H, self.W), dtype=np.int8)
+        grid.fill(1)
+        self.carve_rows(grid, 0, self.h)
+        return grid
+
+    def carve_rows(self, grid, top, bottom):
+        # Carve cell rows top..bottom-1 of every grid in a stack of grids
+        n = grid.shape[0]
+        # Carve out passages at every second row and column
+        grid[:, 2 * top + 1:2 * bottom:2, 1::2] = 0
+
+        # Decide for every cell of every maze whether its run carries on east
+        east = self.rng.floats((n, bottom - top, self.w - 1)) < self.xskew
+        # The top row cannot carve north, so it is one long corridor
+        if top == 0:
+            east[:, 0, :] = True
+        grid[:, 2 * top + 1:2 * bottom:2, 2:self.W - 1:2][east] = 0
+
+        # Only rows below the top one carve north
+        first = max(top, 1)
+        if first >= bottom:
+            return
+        east = east[:, first - top:, :]
+        rows = bottom - first
+
+        # A run closes wherever it does not carry on east, and always at the last column
+        closes = np.ones((n, rows, self.w), dtype=bool)
+        closes[:, :, :-1] = ~east
+        # Every row ends with a closed run, so runs never span two rows of the flattened stack
+        ends = np.flatnonzero(closes)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+
+        # Pick one random cell from each run to carve north from
+        picks = starts + (self.rng.floats(len(ends)) * (ends - starts + 1)).astype(np.int64)
+        maze, rest = np.divmod(picks, rows * self.w)
+        row, col = np.divmod(rest, self.w)
+        # The north wall of cell row i sits on grid row 2i
+        grid[maze, 2 * (first + row), 2 * col + 1] = 0
@@ -9,13 +9,11 @@ Base class for maze solving algorithms.
 This module provides the base class that all maze solving algorithms inherit from.
 """
 import numpy as np
-from numpy.random import shuffle
-from typing import List, Tuple, Optional
-try:
-    from constants import MAX_CLEAR_ATTEMPTS_MULTIPLIER
-except ImportError:
-    # Fallback if constants module is not available
-    MAX_CLEAR_ATTEMPTS_MULTIPLIER = 1
+from typing import Callable, List, Tuple, Optional
+from adjacency import build_adjacency, fill_dead_ends, NEIGHBOUR_OFFSETS
+from events import RETREAT
+from rng import RandomBuffer, Seed
+from utils import readonly_view
 
 
 class solveAlgo:
@@ -25,13 +23,51 @@ class solveAlgo:
     This class provides common functionality for maze solvers, including
     neighbor finding, path clearing, and utility methods.
     
+    Solvers never modify the grid: they see a read-only view of it, and any
+    per-solve state (visit counts, distances, parents) lives in overlay
+    buffers obtained from ``overlay``, which are kept and reused across
+    repeated solves of the same size. Setting ``factory`` (for example to
+    ``utils.memmap_factory()``) makes overlays disk-backed as well.
+    
+    Random choices come from the solver's own ``rng``, so solves with a
+    seeded solver are reproducible. Solvers built with ``prune=True`` have
+    every dead end filled in before they start, so they only ever see the
+    cells that lead from start to end.
+    
     Attributes:
-        grid: The maze grid to solve
+        grid: Read-only view of the maze grid to solve
+        adjacency: Open-direction mask of every grid position (see adjacency.py)
         start: Starting position tuple (row, column)
         end: Ending position tuple (row, column)
+        factory: Called with (shape, dtype) to create overlay buffers, None
+            to allocate them in memory
+        rng: Source of every random choice the solver makes
+        prune: Whether dead ends are filled in when a maze is loaded
+        counters: Work counters of the last solve (neighbour queries, steps,
+            backtracks, ...), filled in by the solver once it is done
+        events: Receives VISIT and RETREAT events as the solver moves (see
+            events.py; Maze.solve adds PATH events for the solution it
+            keeps), None to record nothing
     """
+
+    factory: Optional[Callable[[Tuple[int, ...], type], np.ndarray]] = None
+
+    def __init__(self, seed: Seed = None, prune: bool = False) -> None:
+        """
+        Initialize the solver.
+        
+        Args:
+            seed: Seed or np.random.Generator for the solver's random source,
+                None for fresh OS entropy
+            prune: Fill in every dead end before solving (see adjacency.fill_dead_ends)
+        """
+        self.rng = RandomBuffer(seed)
+        self.prune = prune
+        self.counters = {}
+        self.events = None
     
-    def solve(self, grid: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> List[List[Tuple[int, int]]]:
+    def solve(self, grid: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+              adjacency: Optional[np.ndarray] = None) -> List[List[Tuple[int, int]]]:
         """
         Solve the maze from start to end.
         
@@ -39,25 +75,83 @@ class solveAlgo:
             grid: The maze grid (1 = wall, 0 = passage)
             start: Starting position (row, column)
             end: Ending position (row, column)
+            adjacency: Precomputed open-direction mask of the grid, built if not given
             
         Returns:
             List of solution paths, where each path is a list of (row, column) tuples
         """
-        self.maze_load(grid, start, end)
+        self.maze_load(grid, start, end, adjacency)
         return self._solve()
 
-    def maze_load(self, grid: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> None:
+    def maze_load(self, grid: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                  adjacency: Optional[np.ndarray] = None) -> None:
         """
-        Load the maze grid and start/end points.
+        Load the maze grid, its adjacency index and start/end points.
         
         Args:
             grid: The maze grid to solve
             start: Starting position (row, column)
             end: Ending position (row, column)
+            adjacency: Precomputed open-direction mask of the grid, built if not given
+            
+        Raises:
+            ValueError: If the grid is not 2D or the adjacency index does not match its shape
         """
-        self.grid = grid.copy()
+        if grid.ndim != 2:
+            raise ValueError(f"Solvers work on 2D grids, got a grid of shape {grid.shape}")
+        if adjacency is None:
+            adjacency = build_adjacency(grid)
+        elif adjacency.shape != grid.shape:
+            raise ValueError(f"Adjacency index shape {adjacency.shape} does not match grid shape {grid.shape}")
+        self.grid = readonly_view(grid)
         self.start = start
         self.end = end
+        self.counters = {}
+        if self.prune:
+            # The pruned mask is a pooled overlay, the shared index is left untouched
+            pruned = fill_dead_ends(adjacency, (start, end), self.overlay("pruned", np.uint8))
+            if self.events is not None:
+                # Every position the filling closed off is ruled out at once
+                self.events.extend(np.flatnonzero((grid == 0) & (pruned == 0)), RETREAT)
+            adjacency = pruned
+        self.adjacency = readonly_view(np.ascontiguousarray(adjacency))
+        # Memoryview lookups avoid building a NumPy scalar on every step
+        self.open_directions = memoryview(self.adjacency)
+
+    def overlay(self, name: str, dtype: type = np.int32, fill: int = 0,
+                shape: Optional[Tuple[int, ...]] = None) -> np.ndarray:
+        """
+        Get a per-solve state buffer, reusing the one from the previous solve if possible.
+
+        Buffers are pooled per solver instance and keyed by name, so repeated
+        solves of same-sized mazes allocate nothing.
+
+        Args:
+            name: Name of the buffer (e.g. "visits", "distances")
+            dtype: NumPy dtype of the buffer
+            fill: Value every element is reset to
+            shape: Shape of the buffer, defaults to the grid's shape
+
+        Returns:
+            The buffer, filled with ``fill``
+        """
+        shape = self.grid.shape if shape is None else tuple(shape)
+        pool = self.__dict__.setdefault("_overlays", {})
+        buffer = pool.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype) if self.factory is None else self.factory(shape, dtype)
+            pool[name] = buffer
+        buffer.fill(fill)
+        return buffer
+
+    def overlay_nbytes(self) -> int:
+        """
+        Total size of the pooled per-solve state buffers.
+
+        Returns:
+            Number of bytes held by this solver's overlay buffers
+        """
+        return sum(buffer.nbytes for buffer in self.__dict__.get("_overlays", {}).values())
 
     def _solve(self) -> List[List[Tuple[int, int]]]:
         """
@@ -72,8 +166,8 @@ class solveAlgo:
         """
         Find available neighboring cells for the given position.
         
-        Searches for neighbors two cells away that are accessible (no walls
-        between current position and neighbor).
+        Looks up the neighbors two cells away that are accessible (no walls
+        between current position and neighbor) in the adjacency index.
         
         Args:
             posi: Current position (row, column)
@@ -82,27 +176,28 @@ class solveAlgo:
             List of (row, column) tuples representing accessible neighbors
         """
         r, c = posi
-        ns = []
-
-        if r > 1 and not self.grid[r - 1, c] and not self.grid[r - 2, c]:
-            ns.append((r - 2, c))
-        if (
-            r < self.grid.shape[0] - 2
-            and not self.grid[r + 1, c]
-            and not self.grid[r + 2, c]
-        ):
-            ns.append((r + 2, c))
-        if c > 1 and not self.grid[r, c - 1] and not self.grid[r, c - 2]:
-            ns.append((r, c - 2))
-        if (
-            c < self.grid.shape[1] - 2
-            and not self.grid[r, c + 1]
-            and not self.grid[r, c + 2]
-        ):
-            ns.append((r, c + 2))
-        shuffle(ns)
+        ns = [(r + dr, c + dc) for dr, dc in NEIGHBOUR_OFFSETS[self.open_directions[r, c]]]
+        self.rng.shuffle(ns)
         return ns
 
+    def flat_path(self, cells: List[int]) -> List[Tuple[int, int]]:
+        """
+        Turn a walk over flat cell indices into a solution path.
+        
+        Args:
+            cells: Flat grid indices of the cells walked, from start to end
+            
+        Returns:
+            List of (row, column) tuples with the walls between the cells,
+            excluding the start and end cells themselves
+        """
+        width = self.grid.shape[1]
+        path = []
+        for a, b in zip(cells, cells[1:]):
+            path.append(divmod((a + b) // 2, width))
+            path.append(divmod(b, width))
+        return path[:-1]
+
     def midway(self, a: Tuple[int, int], b: Tuple[int, int]) -> Tuple[int, int]:
         """
         Calculate the cell midway between two cells.
@@ -156,7 +251,9 @@ class solveAlgo:
         Remove redundant loops from a solution path.
         
         Removes cycles where the path visits the same cell multiple times,
-        keeping only the direct path.
+        keeping only the direct path. Runs in a single pass: after a cell is
+        kept, the walk jumps straight past the last time it visits that
+        cell, so every loop is erased in O(n) time.
         
         Args:
             solution: List of (row, column) tuples representing the path
@@ -166,30 +263,16 @@ class solveAlgo:
         """
         if not solution or len(solution) <= 1:
             return solution
-        
-        found = True
-        attempt = 0
-        max_attempt = len(solution) * MAX_CLEAR_ATTEMPTS_MULTIPLIER
-        solution = list(solution)  # Make a copy to avoid modifying the original
-
-        while found and len(solution) > 2 and attempt < max_attempt:
-            found = False
-            attempt += 1
-
-            for i in range(len(solution) - 1):
-                first = solution[i]
-                # Check if this cell appears later in the solution
-                for j in range(i + 1, len(solution)):
-                    if solution[j] == first:
-                        first_i = i
-                        last_i = j
-                        found = True
-                        break
-                if found:
-                    break
-
-            if found:
-                solution = solution[:first_i] + solution[last_i:]
+
+        # Index of the last time the walk visits each cell
+        last = {cell: i for i, cell in enumerate(solution)}
+        cleared = []
+        i = 0
+        while i < len(solution):
+            cell = solution[i]
+            cleared.append(cell)
+            i = last[cell] + 1
+        solution = cleared
 
         if len(solution) > 1:
             if solution[0] == self.start:
@@ -1,62 +1,79 @@
-from random import choice  
+import numpy as np
 from SolveAlgo import solveAlgo  
+from adjacency import flat_neighbour_offsets
+from disjoint_set import index_dtype
+from events import RETREAT, VISIT
+try:
+    from constants import MAX_VISIT_COUNT
+except ImportError:
+    # Fallback if constants module is not available
+    MAX_VISIT_COUNT = 2
 
 class Tremaux(solveAlgo):  
+    # Tremaux's algorithm: every passage is marked each time it is walked, and the marks
+    # decide where to go next. Marks live in a uint8 overlay indexed by the flat position
+    # of the wall cell between two cells, and the walk is a stack of flat cell indices that
+    # is popped whenever a passage is walked back, so it always holds the current route.
+    # The solution is that route, not the whole walk, so solving with clear=False no longer
+    # returns every backtrack.
 
-    def __init__(self):  
-        self.visited_cells = {}  # Dictionary to store visited cells and their visit counts
+    def __init__(self, seed=None, prune=False):  
+        super(Tremaux, self).__init__(seed, prune)
+        self.marks = None  # Overlay array holding the number of marks on every passage
 
     def _solve(self):  
-        self.visited_cells = {}
-        solution = []
-        current = self.start
-        solution.append(current)
-        self.visit(current)
-        # Looping until reaching one cell away from the end
-        while not self.one_away(solution[-1], self.end):
-            # Getting available neighbours of the current cell
-            ns = self.available_neighbours(solution[-1])
-            # Choosing the next cell based on Tremaux algorithm
-            nxt = self.next(ns, solution)
-            # Adding the midpoint and the next cell to the solution path and marking the next cell as visited
-            solution.append(self.midway(solution[-1], nxt))
-            solution.append(nxt)
-            self.visit(nxt)
+        width = self.grid.shape[1]
+        steps = flat_neighbour_offsets(width)
+        open_directions = memoryview(self.adjacency.reshape(-1))
+        start = self.start[0] * width + self.start[1]
+        end = self.end[0] * width + self.end[1]
 
-        return [solution]  
+        self.marks = self.overlay("marks", np.uint8)
+        marks = memoryview(self.marks.reshape(-1))
+        # The route never visits a cell twice, so it fits in one slot per cell
+        cells = (self.grid.shape[0] // 2) * (width // 2)
+        track = memoryview(self.overlay("walk", index_dtype(self.grid.size), shape=(cells,)))
+        track[0] = start
+        top = 0
+        moves = backtracks = peak = 0
+        emit = None if self.events is None else self.events.emit
 
-    def visit(self, cell):  # Method to mark a cell as visited and update its visit count
-        if cell not in self.visited_cells:
-            self.visited_cells[cell] = 0  
-        self.visited_cells[cell] += 1  # Increment visit count for the cell
+        current = start
+        entry = -1  # Passage the walk arrived through (-1 at the start)
+        # Looping until the walk reaches the end
+        while current != end:
+            passages = [(current + step // 2, step) for step in steps[open_directions[current]]]
+            visited = any(marks[wall] for wall, _ in passages if wall != entry)
+            if entry >= 0 and visited and marks[entry] == 1:
+                # Arriving at a visited cell through a fresh passage: turn back
+                wall = entry
+                step = 2 * (entry - current)
+            else:
+                # Otherwise take a passage with as few marks as possible, never one marked twice
+                fewest = min((marks[wall] for wall, _ in passages), default=MAX_VISIT_COUNT)
+                if fewest >= MAX_VISIT_COUNT:
+                    # Every passage has been walked both ways: the end cannot be reached
+                    self.counters = {"steps": moves, "backtracks": backtracks, "peak_path": peak + 1}
+                    return []
+                wall, step = self.rng.choice([p for p in passages if marks[p[0]] == fewest])
+            if marks[wall] < MAX_VISIT_COUNT:
+                marks[wall] += 1  # Mark the passage
+            current += step
+            entry = wall
+            moves += 1
+            # Walking back to the previous cell of the route shortens it, anything else extends it
+            if top > 0 and track[top - 1] == current:
+                if emit is not None:
+                    emit(track[top], RETREAT)
+                top -= 1
+                backtracks += 1
+            else:
+                top += 1
+                track[top] = current
+                if top > peak:
+                    peak = top
+                if emit is not None:
+                    emit(current, VISIT)
 
-    def get_visit_count(self, cell):  # get the visit count of a cell
-        if cell not in self.visited_cells:
-            return 0
-        else:
-            return self.visited_cells[cell] if self.visited_cells[cell] < 3 else 2  # Limiting visit count to 2
-
-    def next(self, ns, solution):  #  determine the next cell to visit
-        if len(ns) == 0:
-            # No neighbours available, should not happen in a valid maze
-            raise ValueError("No available neighbours found")
-        if len(ns) == 1: 
-            return ns[0]  
-
-        visit_counts = {}  # Dictionary to store visit counts of neighbours
-        for neighbour in ns:  # Iterating over available neighbours
-            visit_count = self.get_visit_count(neighbour)  # Getting visit count for the neighbour
-            if visit_count not in visit_counts:
-                visit_counts[visit_count] = []  
-            visit_counts[visit_count].append(neighbour)  # Adding neighbour to corresponding visit count list
-
-        if 0 in visit_counts:  # If unvisited neighbours are available
-            return choice(visit_counts[0])  # Return a randomly chosen unvisited neighbour
-        elif 1 in visit_counts:  
-            if len(visit_counts[1]) > 1 and len(solution) > 2 and solution[-3] in visit_counts[1]:
-                visit_counts[1].remove(solution[-3])  # Removing backtracked neighbour if present
-            return choice(visit_counts[1])  # Return a randomly chosen neighbour with one visit
-        else:  
-            if len(visit_counts[2]) > 1 and len(solution) > 2 and solution[-3] in visit_counts[2]:
-                visit_counts[2].remove(solution[-3])  # Removing backtracked neighbour if present
-            return choice(visit_counts[2])  
+        self.counters = {"steps": moves, "backtracks": backtracks, "peak_path": peak + 1}
+        return [self.flat_path(track[:top + 1].tolist())]
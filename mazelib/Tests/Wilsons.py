@@ -1,94 +1,181 @@
-from random import choice, randrange  
-import numpy as np  
+import numpy as np
 
-from GenAlgo import genAlgo  
+from GenAlgo import genAlgo
+from events import CARVE
+from indexed_set import IndexedSet
 
 
-class Wilsons(genAlgo):  
+# State of every cell in the padded cell array
+UNVISITED = 0
+IN_MAZE = 1
+OUTSIDE = 2
 
-    def __init__(self, w, h, hunt_type="random"): 
-        super(Wilsons, self).__init__(w, h)
+# Largest number of random directions drawn at a time
+DIRECTION_BLOCK = 1 << 16
+
+# Directions drawn per cell still outside the maze when a block runs out, and the
+# smallest block drawn, so small mazes do not draw a full DIRECTION_BLOCK
+DIRECTIONS_PER_CELL = 4
+MIN_DIRECTION_BLOCK = 64
+
+
+class Wilsons(genAlgo):
+
+    def __init__(self, w, h, hunt_type="random", d=None, factory=None, seed=None):
+        super(Wilsons, self).__init__(w, h, d, factory, seed)
+        if hunt_type not in ("random", "serpentine"):
+            raise ValueError(f"Unknown hunt type {hunt_type!r}, expected 'random' or 'serpentine'")
         self.hunt_type = hunt_type
 
-    def generate(self):  
-        
+    def generate(self):
+
         # Creating an empty grid using numpy
-        grid = np.empty((self.H, self.W), dtype=np.int8)
-        grid.fill(1)  
+        grid = self.empty_grid()
+        self.cells = memoryview(grid.reshape(-1))
+
+        # Cells are tracked in an array with one extra cell on each side of every axis;
+        # the padding is marked as outside, so a walk never needs a bounds check
+        sizes = (self.h, self.w) if self.d is None else (self.d, self.h, self.w)
+        self.padded_shape = tuple(size + 2 for size in sizes)
+        state = np.empty(self.padded_shape, dtype=np.uint8)
+        state.fill(OUTSIDE)
+        state[(slice(1, -1),) * state.ndim] = UNVISITED
+        self.state = memoryview(state.reshape(-1))
+        self.padded_strides = [stride // state.itemsize for stride in state.strides]
+        self.grid_strides = self.flat_strides()
+
+        # Direction taken when a walk last left each cell (North, South, East, West, Up, Down)
+        self.walk = memoryview(np.zeros(state.size, dtype=np.int8))
+        row, layer = self.padded_strides[-2], self.padded_strides[0]
+        self.steps = [-row, row, 1, -1] + ([-layer, layer] if self.d is not None else [])
+        # Offset from a cell to the wall it knocks down when leaving in each direction
+        self.walls = [wall for wall, _ in self.flat_offsets()]
+        self.directions = []
+        self.direction_pos = 0
+        self.directions_drawn = 0
+        self.carved = 0  # Grid positions turned into passages
+
+        # Every inner cell starts out unvisited
+        self.unvisited = None
+        if self.hunt_type == "random":
+            self.unvisited = IndexedSet(state.size)
+            self.unvisited.fill(np.flatnonzero(state.reshape(-1) == UNVISITED))
+        self.hunt_pos = 0
 
         # Setting a random starting point in the grid
-        grid[randrange(1, self.H, 2)][randrange(1, self.W, 2)] = 0
-        num_visited = 1  # Number of cells visited initialized to 1
-        row, col = self.chase(grid, num_visited)  # Getting initial coordinates for chase
+        start = self.cell_id(*(self.rng.randrange(1, size, 2) for size in self.shape))
+        self.add_cell(grid, start)
+        num_visited = self.num_visited = 1  # Number of cells visited initialized to 1
+        position = self.chase(grid, num_visited)  # Getting initial coordinates for chase
 
+        walks = 0
         # Looping until no new cell can be visited
-        while row != -1 and col != -1:
-            walk = self.gen_rand_walk(grid, (row, col))  # Generating random walk path
-            num_visited += self.solve_rand_walk(grid, walk, (row, col))  # Solving the walk and updating visited cells
-            (row, col) = self.chase(grid, num_visited)  # Updating chase coordinates
-
-        return grid  
+        while position[0] != -1:
+            walks += 1
+            walk = self.gen_rand_walk(grid, position)  # Generating random walk path
+            num_visited += self.solve_rand_walk(grid, walk, position)  # Solving the walk and updating visited cells
+            self.num_visited = num_visited
+            position = self.chase(grid, num_visited)  # Updating chase coordinates
+
+        # Directions used so far: one per walk step, plus redraws of those leading off the grid
+        steps = self.directions_drawn - (len(self.directions) - self.direction_pos)
+        self.counters = {"cells_carved": self.carved, "walks": walks, "direction_draws": steps,
+                         "cells_added": num_visited}
+        return grid
 
     def chase(self, grid, count):  # determine the next cell to visit
-        return self.random_chase(grid, count)  # Using random chase 
-
-    def random_chase(self, grid, count):  # Method for random chase 
-        if count >= (self.h * self.w):  
-            return (-1, -1)  
-        return (randrange(1, self.H, 2), randrange(1, self.W, 2))  
+        if self.hunt_type == "serpentine":
+            return self.serpentine_chase(grid, count)
+        return self.random_chase(grid, count)  # Using random chase
+
+    def random_chase(self, grid, count):  # Pick a uniformly random cell that is not in the maze yet
+        if count >= self.num_cells():
+            return (-1,) * len(self.shape)
+        return self.cell_position(self.unvisited.item(self.rng.randrange(len(self.unvisited))))
+
+    def serpentine_chase(self, grid, count):  # Pick the next unvisited cell, sweeping rows back and forth
+        if count >= self.num_cells():
+            return (-1,) * len(self.shape)
+        while True:
+            row, col = divmod(self.hunt_pos, self.w)
+            # Odd rows (counted across layers) are swept right to left
+            if row % 2:
+                col = self.w - 1 - col
+            layer, row = divmod(row, self.h)
+            position = (row, col) if self.d is None else (layer, row, col)
+            cell = sum((k + 1) * stride for k, stride in zip(position, self.padded_strides))
+            if self.state[cell] == UNVISITED:
+                return self.cell_position(cell)
+            self.hunt_pos += 1
 
     def gen_rand_walk(self, grid, start):  # Method to generate a random walk path
-        direction = self.rand_direction(start)  # Getting a random direction
-        walk = {}  
-        walk[start] = direction  # Setting initial direction in the walk
-        current = self.move(start, direction)  # Moving to the next cell
-
-        # Looping until a valid path is found
-        while grid[current[0]][current[1]] == 1:
-            direction = self.rand_direction(current)  # Getting a new random direction
+        state = self.state
+        walk = self.walk
+        steps = self.steps
+        directions = self.directions
+        pos = self.direction_pos
+        current = self.cell_id(*start)
+
+        # Looping until the walk runs into the maze
+        while True:
+            if pos == len(directions):
+                left = self.num_cells() - self.num_visited
+                block = min(DIRECTION_BLOCK, max(MIN_DIRECTION_BLOCK, DIRECTIONS_PER_CELL * left))
+                directions = self.directions = self.rng.integers(len(steps), block)
+                self.directions_drawn += block
+                pos = 0
+            direction = directions[pos]  # Getting a new random direction
+            pos += 1
+            nxt = current + steps[direction]
+            s = state[nxt]
+            # Directions leading off the grid are simply redrawn
+            if s == OUTSIDE:
+                continue
             walk[current] = direction  # Setting direction in the walk
-            current = self.move(current, direction)  # Moving to the next cell
-
-        return walk  
-
-    def rand_direction(self, current):  # Method to get a random direction from a cell
-        r, c = current  # Extracting row and column from current cell coordinates
-        options = []  # List to store available directions
-
-        # Checking available directions and adding them to options list
-        if r > 1:
-            options.append(0)  # North
-        if r < (self.H - 2):
-            options.append(1)  # South
-        if c > 1:
-            options.append(2)  # East
-        if c < (self.W - 2):
-            options.append(3)  # West
-
-        direction = choice(options)  # Choosing a random direction from available options
-        if direction == 0:
-            return (-2, 0)  # North
-        elif direction == 1:
-            return (2, 0)  # South
-        elif direction == 2:
-            return (0, 2)  # East
-        else:
-            return (0, -2)  # West
-
-    def move(self, start, direction):  # move from one cell to another
-        return (start[0] + direction[0], start[1] + direction[1])  # Calculating new coordinates after movement
+            current = nxt  # Moving to the next cell
+            if s == IN_MAZE:
+                break
+
+        self.direction_pos = pos
+        return walk
 
     def solve_rand_walk(self, grid, walk, start):  # solve the random walk path
         visits = 0  # Counter for visited cells
-        current = start  # Setting current cell to starting cell
+        state = self.state
+        steps = self.steps
+        current = self.cell_id(*start)  # Setting current cell to starting cell
 
         # Looping until reaching an already visited cell
-        while grid[current[0]][current[1]] != 0:
-            grid[current] = 0  # Marking the current cell as visited
-            next1 = self.move(current, walk[current])  # Moving to the next cell based on walk direction
+        while state[current] != IN_MAZE:
+            position = self.add_cell(grid, current)  # Marking the current cell as visited
+            direction = walk[current]
             # Marking the wall cell between current and next cell as visited
-            grid[(next1[0] + current[0]) // 2, (next1[1] + current[1]) // 2] = 0
-            visits += 1  
-            current = next1  
-
-        return visits  
+            self.cells[position + self.walls[direction]] = 0
+            self.carved += 1
+            if self.events is not None:
+                self.events.emit(position + self.walls[direction], CARVE)
+            visits += 1
+            current += steps[direction]  # Moving to the next cell based on walk direction
+
+        return visits
+
+    def add_cell(self, grid, cell):  # Mark a cell as part of the maze, returning its flat grid index
+        self.state[cell] = IN_MAZE
+        position = sum(k * stride for k, stride in zip(self.cell_position(cell), self.grid_strides))
+        self.cells[position] = 0
+        self.carved += 1
+        if self.events is not None:
+            self.events.emit(position, CARVE)
+        if self.unvisited is not None:
+            self.unvisited.discard(cell)
+        return position
+
+    def cell_id(self, *position):  # Index of a grid cell in the padded cell array
+        return sum(((k + 1) // 2) * stride for k, stride in zip(position, self.padded_strides))
+
+    def cell_position(self, cell):  # Grid coordinates of a cell in the padded cell array
+        position = []
+        for size in reversed(self.padded_shape):
+            cell, k = divmod(cell, size)
+            position.append(2 * k - 1)
+        return tuple(reversed(position))
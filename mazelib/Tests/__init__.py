@@ -13,9 +13,14 @@ from BackTrackingSolver import BacktrackingSolver
 from BinaryTree import BinaryTree
 from Ellers import Ellers
 from Wilsons import Wilsons
+from Sidewinder import Sidewinder
 from Tremaux import Tremaux
 from RandomMouse import RandomMouse
 from ShortestPath import ShortestPath
+from AStar import AStar
+from BidirectionalBFS import BidirectionalBFS
+from DeadEndFilling import DeadEndFilling
+from registry import GENERATORS, SOLVERS
 
 __all__ = [
     'Maze',
@@ -26,9 +31,15 @@ __all__ = [
     'BinaryTree',
     'Ellers',
     'Wilsons',
+    'Sidewinder',
     'Tremaux',
     'RandomMouse',
     'ShortestPath',
+    'AStar',
+    'BidirectionalBFS',
+    'DeadEndFilling',
+    'GENERATORS',
+    'SOLVERS',
 ]
 
 __version__ = '1.0.0'
@@ -0,0 +1,155 @@
+"""
+Precomputed cell-graph index shared by all maze solvers.
+
+This module turns a maze grid into a per-cell 4-bit mask of open
+directions in one vectorized pass, so solvers can look up a cell's
+neighbours in O(1) instead of probing the grid on every step. It can
+also prune every dead end from a mask, leaving only the cells that lead
+somewhere.
+"""
+from typing import Optional, Sequence, Tuple
+import numpy as np
+try:
+    from constants import DIRECTION_NORTH, DIRECTION_SOUTH, DIRECTION_EAST, DIRECTION_WEST, GENERATION_CHUNK_BYTES
+except ImportError:
+    # Fallback if constants module is not available
+    DIRECTION_NORTH = 0
+    DIRECTION_SOUTH = 1
+    DIRECTION_EAST = 2
+    DIRECTION_WEST = 3
+    GENERATION_CHUNK_BYTES = 1 << 24
+
+# Bit set in a cell's mask when the neighbour in that direction is reachable
+NORTH_BIT = 1 << DIRECTION_NORTH
+SOUTH_BIT = 1 << DIRECTION_SOUTH
+EAST_BIT = 1 << DIRECTION_EAST
+WEST_BIT = 1 << DIRECTION_WEST
+
+# (row, column) jump to the neighbour behind each bit, in bit order
+_BIT_STEPS = (
+    (NORTH_BIT, (-2, 0)),
+    (SOUTH_BIT, (2, 0)),
+    (EAST_BIT, (0, 2)),
+    (WEST_BIT, (0, -2)),
+)
+
+# Neighbour jumps for every possible 4-bit mask
+NEIGHBOUR_OFFSETS = tuple(
+    tuple(step for bit, step in _BIT_STEPS if mask & bit) for mask in range(16)
+)
+
+# Number of open directions of every possible 4-bit mask
+DEGREE = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.uint8)
+
+# Bit of the reverse direction, for every single-bit mask
+_OPPOSITE = np.zeros(16, dtype=np.uint8)
+for _bit, _reverse in ((NORTH_BIT, SOUTH_BIT), (SOUTH_BIT, NORTH_BIT), (EAST_BIT, WEST_BIT), (WEST_BIT, EAST_BIT)):
+    _OPPOSITE[_bit] = _reverse
+
+
+def build_adjacency(grid: np.ndarray, out: Optional[np.ndarray] = None,
+                    chunk_rows: Optional[int] = None) -> np.ndarray:
+    """
+    Build the open-direction mask of every grid position.
+
+    A direction is open when both the wall between the position and the
+    neighbour two cells away and the neighbour itself are passages, and the
+    neighbour lies inside the grid.
+
+    The mask is built a block of rows at a time (each block reads two
+    extra rows on either side), so a disk-backed grid and output are
+    streamed through memory instead of being loaded whole.
+
+    Args:
+        grid: The maze grid (1 = wall, 0 = passage)
+        out: Optional uint8 array with the grid's shape to write the mask into
+        chunk_rows: Number of rows per block, sized to roughly
+            GENERATION_CHUNK_BYTES if not given
+
+    Returns:
+        A uint8 array with the same shape as the grid holding the mask bits
+    """
+    H, W = grid.shape
+    if out is None:
+        out = np.empty(grid.shape, dtype=np.uint8)
+    if chunk_rows is None:
+        chunk_rows = max(1, GENERATION_CHUNK_BYTES // W)
+    for r0 in range(0, H, chunk_rows):
+        r1 = min(H, r0 + chunk_rows)
+        lo, hi = max(0, r0 - 2), min(H, r1 + 2)
+        passage = grid[lo:hi] == 0
+        mask = np.zeros(passage.shape, dtype=np.uint8)
+        mask[2:, :] |= (passage[1:-1, :] & passage[:-2, :]) * np.uint8(NORTH_BIT)
+        mask[:-2, :] |= (passage[1:-1, :] & passage[2:, :]) * np.uint8(SOUTH_BIT)
+        mask[:, :-2] |= (passage[:, 1:-1] & passage[:, 2:]) * np.uint8(EAST_BIT)
+        mask[:, 2:] |= (passage[:, 1:-1] & passage[:, :-2]) * np.uint8(WEST_BIT)
+        out[r0:r1] = mask[r0 - lo:r1 - lo]
+    return out
+
+
+def flat_neighbour_offsets(width: int) -> tuple:
+    """
+    Flat-index jumps to the neighbours behind every possible 4-bit mask.
+
+    Solvers that work on flat grid indices look a cell's mask up in this
+    table instead of NEIGHBOUR_OFFSETS.
+
+    Args:
+        width: Width of the grid the flat indices refer to
+
+    Returns:
+        Tuple of 16 tuples of flat offsets, indexed by mask
+    """
+    return tuple(tuple(dr * width + dc for dr, dc in steps) for steps in NEIGHBOUR_OFFSETS)
+
+
+def fill_dead_ends(adjacency: np.ndarray, keep: Sequence[Tuple[int, int]],
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Prune every dead end from an adjacency mask.
+
+    A dead end is a cell with exactly one open direction. All of them are
+    found at once from the degree of every mask and closed off together,
+    along with the way back into them from their neighbour; the
+    neighbours that become dead ends form the next wave. Only the cells
+    that lie on a route between the kept cells (or on a loop) keep any
+    open directions, so in a perfect maze just the corridor from start to
+    end is left.
+
+    Args:
+        adjacency: Open-direction mask of every grid position
+        keep: (row, column) cells that are never filled, e.g. start and end
+        out: Optional uint8 array with the mask's shape to write the result into
+
+    Returns:
+        The pruned mask; positions other than cells are cleared
+    """
+    H, W = adjacency.shape
+    if out is None:
+        out = np.empty(adjacency.shape, dtype=np.uint8)
+    out[...] = adjacency
+    # Only cells (odd row and column) take part in the walk
+    out[0::2, :] = 0
+    out[:, 0::2] = 0
+    mask = out.reshape(-1)
+
+    # Flat jump to the only neighbour of a dead end, for every single-bit mask
+    steps = np.zeros(16, dtype=np.int64)
+    for mask_bits, offsets in enumerate(NEIGHBOUR_OFFSETS):
+        if DEGREE[mask_bits] == 1:
+            steps[mask_bits] = offsets[0][0] * W + offsets[0][1]
+    kept = np.array([r * W + c for r, c in keep], dtype=np.int64)
+
+    dead = np.flatnonzero(DEGREE[mask] == 1)
+    while len(dead):
+        dead = dead[~np.isin(dead, kept)]
+        if not len(dead):
+            break
+        bits = mask[dead]
+        # Two dead ends can share a neighbour, so the reverse bits are cleared unbuffered
+        neighbours = dead + steps[bits]
+        mask[dead] = 0
+        np.bitwise_and.at(mask, neighbours, ~_OPPOSITE[bits])
+        neighbours = np.unique(neighbours)
+        dead = neighbours[DEGREE[mask[neighbours]] == 1]
+    return out
@@ -0,0 +1,215 @@
+"""
+Non-interactive benchmark harness for the generator x solver matrix.
+
+Runs every combination of the selected generators, solvers and maze
+sizes a number of times across a process pool, timing maze generation,
+entrance placement, solving and solution clearing separately with
+``perf_counter_ns``, and reports min/median/p95 per cell of the matrix
+as JSON and/or CSV. Every run gets its own seed derived from ``--seed``,
+so a benchmark is reproducible regardless of how runs land on workers.
+
+Example:
+    python benchmark.py --sizes 25 50 100 --repeats 10 --json results.json --csv results.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter_ns
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from maze import Maze
+from registry import GENERATORS, SOLVERS, lookup
+
+# Timed phases of every run, in the order they happen
+PHASES = ("generate", "entrances", "solve", "clear")
+
+
+def run_task(task: Tuple[str, str, int, np.random.SeedSequence]) -> Dict[str, object]:
+    """
+    Generate, open and solve one maze, timing each phase.
+
+    Args:
+        task: (generator name, solver name, size, seed) tuple
+
+    Returns:
+        Dictionary with the task, the duration of every phase in
+        nanoseconds and the length of the cleared solution
+    """
+    generator_name, solver_name, size, seed = task
+    generator_seed, solver_seed, maze_seed = seed.spawn(3)
+    m = Maze(seed=maze_seed)
+    m.generator = GENERATORS[generator_name](size, size, seed=generator_seed)
+    m.solver = SOLVERS[solver_name](seed=solver_seed)
+
+    t0 = perf_counter_ns()
+    m.generate()
+    t1 = perf_counter_ns()
+    m.generate_entrances()
+    t2 = perf_counter_ns()
+    m.solve(clear=False)
+    t3 = perf_counter_ns()
+    solutions = m.solver.clear_solutions(m.solutions) if m.solutions else m.solutions
+    t4 = perf_counter_ns()
+
+    return {
+        "generator": generator_name,
+        "solver": solver_name,
+        "size": size,
+        "generate": t1 - t0,
+        "entrances": t2 - t1,
+        "solve": t3 - t2,
+        "clear": t4 - t3,
+        "solution_length": len(solutions[0]) if solutions else 0,
+    }
+
+
+def summarise(runs: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """
+    Aggregate individual runs into one record per (generator, solver, size).
+
+    Args:
+        runs: Results returned by run_task
+
+    Returns:
+        List of records holding min/median/p95 nanoseconds for every phase
+        and the median solution length
+    """
+    cells = {}
+    for run in runs:
+        cells.setdefault((run["generator"], run["solver"], run["size"]), []).append(run)
+
+    records = []
+    for (generator_name, solver_name, size), cell_runs in cells.items():
+        record = {"generator": generator_name, "solver": solver_name, "size": size, "runs": len(cell_runs)}
+        for phase in PHASES:
+            times = np.array([run[phase] for run in cell_runs], dtype=np.int64)
+            record[phase] = {
+                "min_ns": int(times.min()),
+                "median_ns": float(np.median(times)),
+                "p95_ns": float(np.percentile(times, 95)),
+            }
+        record["solution_length"] = float(np.median([run["solution_length"] for run in cell_runs]))
+        records.append(record)
+    return records
+
+
+def write_json(path: str, records: List[Dict[str, object]]) -> None:
+    """
+    Write the summary records as a JSON array.
+
+    Args:
+        path: Output file path
+        records: Records returned by summarise
+    """
+    with open(path, "w") as f:
+        json.dump(records, f, indent=2)
+
+
+def write_csv(path: str, records: List[Dict[str, object]]) -> None:
+    """
+    Write the summary records as CSV, one row per matrix cell and phase.
+
+    Args:
+        path: Output file path
+        records: Records returned by summarise
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["generator", "solver", "size", "phase", "runs", "min_ns", "median_ns", "p95_ns", "solution_length"])
+        for record in records:
+            for phase in PHASES:
+                timing = record[phase]
+                writer.writerow([
+                    record["generator"], record["solver"], record["size"], phase, record["runs"],
+                    timing["min_ns"], timing["median_ns"], timing["p95_ns"], record["solution_length"],
+                ])
+
+
+def run_matrix(generators: List[str], solvers: List[str], sizes: List[int], repeats: int,
+               workers: Optional[int] = None, seed: Optional[int] = None) -> List[Dict[str, object]]:
+    """
+    Run the full benchmark matrix and summarise it.
+
+    Args:
+        generators: Generator class names
+        solvers: Solver class names
+        sizes: Maze sizes (cells per side)
+        repeats: Number of runs per matrix cell
+        workers: Number of worker processes, defaults to the CPU count;
+            1 runs everything in the current process
+        seed: Root seed every run's seed is spawned from, None for fresh OS entropy
+
+    Returns:
+        Records returned by summarise
+    """
+    tasks = [
+        (generator_name, solver_name, size)
+        for size in sizes
+        for generator_name in generators
+        for solver_name in solvers
+        for _ in range(repeats)
+    ]
+    # One independent seed per run, fixed by its position in the matrix
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tasks = [task + (task_seed,) for task, task_seed in zip(tasks, seeds)]
+    if workers == 1:
+        runs = list(map(run_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(run_task, tasks))
+    return summarise(runs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Benchmark maze generators and solvers.")
+    parser.add_argument("--generators", nargs="+", default=["all"],
+                        help=f"generator names or 'all' ({', '.join(GENERATORS)})")
+    parser.add_argument("--solvers", nargs="+", default=["all"],
+                        help=f"solver names or 'all' ({', '.join(SOLVERS)})")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 25],
+                        help="maze sizes in cells per side")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per matrix cell")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, help="root seed for reproducible runs")
+    parser.add_argument("--json", dest="json_path", help="write the summary as JSON to this file")
+    parser.add_argument("--csv", dest="csv_path", help="write the summary as CSV to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        generators = [cls.__name__ for cls in lookup(GENERATORS, args.generators)]
+        solvers = [cls.__name__ for cls in lookup(SOLVERS, args.solvers)]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.repeats <= 0 or any(size <= 0 for size in args.sizes):
+        parser.error("sizes and repeats must be positive integers")
+
+    records = run_matrix(generators, solvers, args.sizes, args.repeats, args.workers, args.seed)
+    if args.json_path:
+        write_json(args.json_path, records)
+    if args.csv_path:
+        write_csv(args.csv_path, records)
+
+    # Print a compact median summary in milliseconds
+    print(f"{'generator':<22}{'solver':<20}{'size':>6}" + "".join(f"{phase:>12}" for phase in PHASES))
+    for record in records:
+        print(f"{record['generator']:<22}{record['solver']:<20}{record['size']:>6}"
+              + "".join(f"{record[phase]['median_ns'] / 1e6:>12.3f}" for phase in PHASES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
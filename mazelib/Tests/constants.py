@@ -19,9 +19,6 @@ MIN_ENTRANCE_DISTANCE = 2  # Minimum Manhattan distance between start and end po
 MAX_ENTRANCE_ATTEMPTS = 1000  # Maximum attempts to generate valid entrances
 MAX_END_POINT_ATTEMPTS = 100  # Maximum attempts to generate different end point
 
-# Solution clearing constants
-MAX_CLEAR_ATTEMPTS_MULTIPLIER = 1  # Multiplier for max clear attempts (relative to solution length)
-
 # Neighbor direction offsets (for 2-cell jumps in grid)
 NORTH = (-2, 0)
 SOUTH = (2, 0)
@@ -35,7 +32,10 @@ DIRECTION_EAST = 2
 DIRECTION_WEST = 3
 
 # Tremaux algorithm constants
-MAX_VISIT_COUNT = 2  # Maximum visit count before treating as dead end
+MAX_VISIT_COUNT = 2  # Maximum number of marks on a passage; twice-marked passages are never taken again
+
+# Shortest path solver constants
+SHORTEST_PATH_LIMIT = 64  # Default number of shortest paths returned; open grids have exponentially many
 
 # String representation characters
 CHAR_WALL = "O"
@@ -44,3 +44,27 @@ CHAR_START = "S"
 CHAR_END = "E"
 CHAR_SOLUTION = "#"
 
+# Rendering constants
+RENDER_CHUNK_BYTES = 1 << 20  # Approximate size of each block of rows streamed by Maze.write
+
+# Raster image colours (RGB) and output settings
+COLOR_WALL = (0, 0, 0)
+COLOR_PASSAGE = (255, 255, 255)
+COLOR_SOLUTION = (0, 200, 255)
+COLOR_START = (0, 160, 0)
+COLOR_END = (220, 0, 0)
+COLOR_VISIT = (255, 200, 0)  # Cells a solver has reached (menu animation)
+COLOR_RETREAT = (190, 190, 190)  # Cells a solver walked back from or ruled out (menu animation)
+TILE_PIXELS = 4096  # Largest width and height of each tile written by raster.save_tiles
+PNG_COMPRESS_LEVEL = 6  # zlib level of PNG image data (1 = fastest, 9 = smallest)
+
+
+# Out-of-core constants
+GENERATION_CHUNK_BYTES = 1 << 24  # Approximate size of each block of rows generated or indexed at a time
+
+# Event stream constants
+EVENT_CHUNK = 1 << 16  # Number of events an EventStream buffers before turning them into a NumPy chunk
+ANIMATION_FRAMES = 300  # Number of frames the menu spreads an event replay over
+
+# Random number constants
+RANDOM_BLOCK = 4096  # Number of uniform floats a RandomBuffer draws at a time
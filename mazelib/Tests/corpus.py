@@ -0,0 +1,359 @@
+"""
+Bit-packed maze corpus file format.
+
+A corpus file stores many mazes back to back, each as one bit per cell
+and axis (is the wall towards the next cell along that axis open?), which
+is 2 bits per cell for a 2D maze, about 1/16 of the int8 grid. Start and
+end points and optional solution paths are stored alongside, and a
+fixed-size index at the end of the file gives O(1) random access.
+Readers memory-map the file and only unpack the mazes they touch.
+
+Layout (all integers little-endian):
+    header   MAGIC, version (u4), reserved (u4), count (u8), index offset (u8)
+    records  per maze: packed wall bits, then optional solution data,
+             each padded to 8 bytes
+    index    count entries of INDEX_DTYPE
+
+Example:
+    with CorpusWriter("mazes.corpus") as writer:
+        writer.add_maze(m)
+    corpus = CorpusReader("mazes.corpus")
+    m = corpus[0]
+"""
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from maze import Maze
+
+MAGIC = b"MAZECORP"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+# Largest number of grid axes a corpus entry can describe
+MAX_DIMS = 3
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),            # byte offset of the packed wall bits
+    ("ndim", "<u4"),              # number of grid axes (2 or 3)
+    ("solution_count", "<u4"),    # number of stored solution paths
+    ("shape", "<u4", (MAX_DIMS,)),  # grid shape, right-aligned and padded with 1
+    ("start", "<i4", (MAX_DIMS,)),  # start position, right-aligned, -1 if unset
+    ("end", "<i4", (MAX_DIMS,)),    # end position, right-aligned, -1 if unset
+    ("solution_offset", "<u8"),   # byte offset of the solution data
+])
+
+
+def _cell_shape(shape: Sequence[int]) -> Tuple[int, ...]:
+    # Number of cells along every axis of a grid
+    return tuple(int(size) // 2 for size in shape)
+
+
+def _bit_count(shape: Sequence[int]) -> int:
+    # Number of wall bits stored for a grid
+    return int(np.prod(_cell_shape(shape))) * len(shape)
+
+
+def _inner(axis: int, ndim: int) -> Tuple[slice, ...]:
+    # Every cell except the last one along the given axis
+    return tuple(slice(None, -1) if a == axis else slice(None) for a in range(ndim))
+
+
+def _walls(shape: Sequence[int], axis: int) -> Tuple[slice, ...]:
+    # Walls between consecutive cells along the given axis
+    return tuple(slice(2, size - 1, 2) if a == axis else slice(1, size - 1, 2) for a, size in enumerate(shape))
+
+
+def pack_grid(grid: np.ndarray) -> np.ndarray:
+    """
+    Pack a maze grid into one bit per cell and axis.
+
+    Bit k of a cell says whether the wall between it and the next cell
+    along axis k is open. This only describes grids where every cell (odd
+    index on every axis) is a passage and everything else apart from the
+    walls between neighbouring cells is wall, which is what every
+    generator in this package produces.
+
+    Args:
+        grid: 2D or 3D maze grid (1 = wall, 0 = passage)
+
+    Returns:
+        1D uint8 array of packed bits
+
+    Raises:
+        ValueError: If the grid cannot be represented by wall bits
+    """
+    bits = np.zeros(_cell_shape(grid.shape) + (grid.ndim,), dtype=bool)
+    for axis in range(grid.ndim):
+        # The last cell along an axis has no wall to open, so its bit stays clear
+        bits[_inner(axis, grid.ndim) + (axis,)] = grid[_walls(grid.shape, axis)] == 0
+    packed = np.packbits(bits, bitorder="little")
+    if not np.array_equal(unpack_grid(packed, grid.shape), grid):
+        raise ValueError("Grid is not a cell maze and cannot be stored as wall bits")
+    return packed
+
+
+def unpack_grid(packed: np.ndarray, shape: Sequence[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Rebuild a maze grid from its packed wall bits.
+
+    Args:
+        packed: Packed bits returned by pack_grid
+        shape: Shape of the grid
+        out: Optional int8 array of the grid's shape to unpack into
+
+    Returns:
+        The int8 maze grid
+    """
+    shape = tuple(int(size) for size in shape)
+    ndim = len(shape)
+    cells = _cell_shape(shape)
+    bits = np.unpackbits(packed, count=_bit_count(shape), bitorder="little").view(bool)
+    bits = bits.reshape(cells + (ndim,))
+    grid = np.empty(shape, dtype=np.int8) if out is None else out
+    grid.fill(1)
+    grid[tuple(slice(1, size - 1, 2) for size in shape)] = 0
+    for axis in range(ndim):
+        grid[_walls(shape, axis)] = ~bits[_inner(axis, ndim) + (axis,)]
+    return grid
+
+
+def _pad(position: Optional[Sequence[int]], fill: int) -> List[int]:
+    # Right-align a position or shape in a MAX_DIMS slot
+    position = [] if position is None else [int(k) for k in position]
+    return [fill] * (MAX_DIMS - len(position)) + position
+
+
+class CorpusWriter:
+    """
+    Append mazes to a new corpus file.
+
+    The index and final header are written by ``close``, which the context
+    manager calls automatically.
+
+    Attributes:
+        path: Path of the corpus file
+        count: Number of mazes written so far
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Create (or truncate) a corpus file.
+
+        Args:
+            path: Path of the corpus file
+        """
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        self._entries = []
+
+    @property
+    def count(self) -> int:
+        return len(self._entries)
+
+    def _write_block(self, data: bytes) -> int:
+        # Append data padded to 8 bytes and return where it starts
+        offset = self._f.tell()
+        self._f.write(data)
+        self._f.write(b"\0" * (-len(data) % 8))
+        return offset
+
+    def add(self, grid: np.ndarray, start: Optional[Tuple[int, ...]] = None,
+            end: Optional[Tuple[int, ...]] = None,
+            solutions: Optional[List[List[Tuple[int, ...]]]] = None) -> int:
+        """
+        Append one maze to the corpus.
+
+        Args:
+            grid: 2D or 3D maze grid
+            start: Start position, if any
+            end: End position, if any
+            solutions: Solution paths as lists of positions, if any
+
+        Returns:
+            Index of the maze in the corpus
+
+        Raises:
+            ValueError: If the grid has an unsupported number of axes or is not a cell maze
+        """
+        if grid.ndim not in (2, MAX_DIMS):
+            raise ValueError(f"Corpus mazes must be 2D or 3D, got a grid of shape {grid.shape}")
+        entry = np.zeros((), dtype=INDEX_DTYPE)
+        entry["offset"] = self._write_block(pack_grid(grid).tobytes())
+        entry["ndim"] = grid.ndim
+        entry["shape"] = _pad(grid.shape, 1)
+        entry["start"] = _pad(start, -1)
+        entry["end"] = _pad(end, -1)
+        if solutions:
+            # Path lengths followed by every path's flat grid indices
+            lengths = np.array([len(path) for path in solutions], dtype="<u8")
+            coords = np.array([cell for path in solutions for cell in path], dtype=np.int64).reshape(-1, grid.ndim)
+            indices = np.ravel_multi_index(tuple(coords.T), grid.shape).astype("<i8")
+            entry["solution_count"] = len(solutions)
+            entry["solution_offset"] = self._write_block(lengths.tobytes() + indices.tobytes())
+        self._entries.append(entry)
+        return len(self._entries) - 1
+
+    def add_maze(self, m: Maze) -> int:
+        """
+        Append a Maze with its entrances and solutions.
+
+        Args:
+            m: Maze with a generated grid
+
+        Returns:
+            Index of the maze in the corpus
+        """
+        return self.add(m.grid, m.start, m.end, m.solutions)
+
+    def close(self) -> None:
+        """Write the index and header and close the file."""
+        if self._f.closed:
+            return
+        index = np.array(self._entries, dtype=INDEX_DTYPE)
+        index_offset = self._write_block(index.tobytes())
+        self._f.seek(0)
+        self._f.write(HEADER.pack(MAGIC, VERSION, 0, len(index), index_offset))
+        self._f.close()
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CorpusReader:
+    """
+    Random-access reader over a memory-mapped corpus file.
+
+    Nothing but the header and index is touched when the corpus is opened;
+    each maze is unpacked only when it is requested.
+
+    Attributes:
+        path: Path of the corpus file
+        index: Structured array of INDEX_DTYPE entries, one per maze
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a corpus file.
+
+        Args:
+            path: Path of the corpus file
+
+        Raises:
+            ValueError: If the file is not a corpus of a supported version
+        """
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._data) < HEADER.size:
+            raise ValueError(f"{path} is too small to be a maze corpus")
+        magic, version, _, count, index_offset = HEADER.unpack(self._data[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a maze corpus")
+        if version != VERSION:
+            raise ValueError(f"Unsupported corpus version {version} in {path}")
+        end = index_offset + count * INDEX_DTYPE.itemsize
+        self.index = self._data[index_offset:end].view(INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def shape(self, i: int) -> Tuple[int, ...]:
+        """
+        Grid shape of the i-th maze.
+
+        Args:
+            i: Maze index
+
+        Returns:
+            Shape of the maze's grid
+        """
+        entry = self.index[i]
+        return tuple(int(size) for size in entry["shape"][MAX_DIMS - entry["ndim"]:])
+
+    def grid(self, i: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Unpack the grid of the i-th maze.
+
+        Args:
+            i: Maze index
+            out: Optional int8 array of the grid's shape to unpack into
+
+        Returns:
+            The int8 maze grid
+        """
+        shape = self.shape(i)
+        offset = int(self.index[i]["offset"])
+        nbytes = (_bit_count(shape) + 7) // 8
+        return unpack_grid(self._data[offset:offset + nbytes], shape, out)
+
+    def entrances(self, i: int) -> Tuple[Optional[Tuple[int, ...]], Optional[Tuple[int, ...]]]:
+        """
+        Start and end points of the i-th maze.
+
+        Args:
+            i: Maze index
+
+        Returns:
+            (start, end) tuple, each None if it was not stored
+        """
+        entry = self.index[i]
+        ndim = int(entry["ndim"])
+        points = []
+        for name in ("start", "end"):
+            point = tuple(int(k) for k in entry[name][MAX_DIMS - ndim:])
+            points.append(None if point[0] < 0 else point)
+        return points[0], points[1]
+
+    def solutions(self, i: int) -> Optional[List[List[Tuple[int, ...]]]]:
+        """
+        Solution paths of the i-th maze.
+
+        Args:
+            i: Maze index
+
+        Returns:
+            List of paths as lists of positions, or None if none were stored
+        """
+        entry = self.index[i]
+        count = int(entry["solution_count"])
+        if count == 0:
+            return None
+        shape = self.shape(i)
+        offset = int(entry["solution_offset"])
+        lengths = self._data[offset:offset + 8 * count].view("<u8")
+        flat = self._data[offset + 8 * count:offset + 8 * (count + int(lengths.sum()))].view("<i8")
+        coords = np.stack(np.unravel_index(flat, shape), axis=1).tolist() if len(flat) else []
+        paths = []
+        pos = 0
+        for length in lengths.tolist():
+            paths.append([tuple(c) for c in coords[pos:pos + length]])
+            pos += length
+        return paths
+
+    def maze(self, i: int) -> Maze:
+        """
+        Load the i-th maze into a Maze instance.
+
+        Args:
+            i: Maze index
+
+        Returns:
+            Maze with grid, start, end and solutions set
+        """
+        m = Maze()
+        m.grid = self.grid(i)
+        m.start, m.end = self.entrances(i)
+        m.solutions = self.solutions(i)
+        return m
+
+    def __getitem__(self, i: int) -> Maze:
+        return self.maze(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.maze(i)
@@ -0,0 +1,426 @@
+"""
+Sharded, reproducible maze datasets.
+
+A DatasetSpec names the generators, maze sizes, solver, number of mazes
+per (generator, size) pair and a base seed. ``build`` splits the spec into
+shards of at most ``shard_size`` mazes, generates and solves them across a
+process pool and writes every shard as its own file, either a bit-packed
+corpus (see corpus.py) or a compressed .npz, next to a ``manifest.json``
+listing the spec and every finished shard with its checksum.
+
+Every shard's seed is derived from the base seed and the shard's position
+in the spec alone, so the files are byte-for-byte the same whatever the
+number of workers. Shards are written to a temporary name and renamed once
+complete, and the manifest is updated after each one, so an interrupted
+build picks up where it stopped when run again.
+
+Example:
+    python dataset.py out/ --generators BacktrackingGenerator Wilsons --sizes 25 50 \\
+        --solver ShortestPath --count 100000 --seed 7 --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from corpus import CorpusReader, CorpusWriter
+from maze import Maze
+from registry import GENERATORS, SOLVERS, lookup
+
+MANIFEST = "manifest.json"
+
+# Shard file formats and their extensions
+FORMATS = {"corpus": "corpus", "npz": "npz"}
+
+# Default number of mazes per shard
+SHARD_SIZE = 1000
+
+# A maze record: grid, start, end and the first solution (None without a solver)
+Record = Tuple[np.ndarray, Tuple[int, int], Tuple[int, int], Optional[List[Tuple[int, int]]]]
+
+
+class DatasetSpec:
+    """
+    What a dataset contains.
+
+    Attributes:
+        generators: Generator class names
+        sizes: Maze sizes as the (w, h) pairs passed to the generators
+        solver: Solver class name, None to store mazes without solutions
+        count: Number of mazes per (generator, size) pair
+        seed: Base seed every shard's seed is derived from
+        shard_size: Largest number of mazes per shard
+        fmt: Shard file format, "corpus" or "npz"
+        clear: Whether solutions are cleared of dead ends before they are stored
+    """
+
+    def __init__(self, generators: Sequence[str], sizes: Sequence[Union[int, Sequence[int]]],
+                 solver: Optional[str] = None, count: int = 1, seed: int = 0,
+                 shard_size: int = SHARD_SIZE, fmt: str = "corpus", clear: bool = True) -> None:
+        """
+        Create and validate a spec.
+
+        Args:
+            generators: Generator class names (see registry.py)
+            sizes: Maze sizes, each an int for a square maze or the (w, h)
+                pair the generators are built with
+            solver: Solver class name, None to skip solving
+            count: Number of mazes per (generator, size) pair (must be positive)
+            seed: Base seed (a non-negative integer)
+            shard_size: Largest number of mazes per shard (must be positive)
+            fmt: "corpus" or "npz"
+            clear: Clear solutions before storing them
+
+        Raises:
+            ValueError: If an algorithm is unknown or a number is out of range
+        """
+        self.generators = [cls.__name__ for cls in lookup(GENERATORS, list(generators))]
+        self.solver = None if solver is None else lookup(SOLVERS, [solver])[0].__name__
+        self.sizes = [(int(s), int(s)) if np.isscalar(s) else (int(s[0]), int(s[1])) for s in sizes]
+        self.count = int(count)
+        self.seed = int(seed)
+        self.shard_size = int(shard_size)
+        self.fmt = fmt
+        self.clear = bool(clear)
+        if not self.sizes or any(w <= 0 or h <= 0 for w, h in self.sizes):
+            raise ValueError(f"Dataset sizes must be positive, got {self.sizes}")
+        if self.count <= 0 or self.shard_size <= 0 or self.seed < 0:
+            raise ValueError(f"Count and shard size must be positive and the seed non-negative, "
+                             f"got count={self.count}, shard_size={self.shard_size}, seed={self.seed}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown shard format {fmt!r}, expected one of {', '.join(FORMATS)}")
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        The spec as JSON-compatible values.
+
+        Returns:
+            Dictionary accepted by ``from_dict``
+        """
+        return {
+            "generators": self.generators,
+            "sizes": [list(size) for size in self.sizes],
+            "solver": self.solver,
+            "count": self.count,
+            "seed": self.seed,
+            "shard_size": self.shard_size,
+            "fmt": self.fmt,
+            "clear": self.clear,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "DatasetSpec":
+        """
+        Rebuild a spec from ``to_dict`` output.
+
+        Args:
+            data: Dictionary of spec values
+
+        Returns:
+            The spec
+        """
+        return cls(**data)
+
+    def shards(self) -> List[Tuple[int, str, Tuple[int, int], int, Tuple[int, int]]]:
+        """
+        Split the spec into shards.
+
+        Returns:
+            List of (shard index, generator name, (w, h), number of
+            mazes, seed key) tuples; the seed key is the (pair, shard within
+            pair) position the shard's seed is derived from
+        """
+        shards = []
+        pairs = [(name, size) for name in self.generators for size in self.sizes]
+        for pair, (name, size) in enumerate(pairs):
+            for k, first in enumerate(range(0, self.count, self.shard_size)):
+                shards.append((len(shards), name, size, min(self.shard_size, self.count - first), (pair, k)))
+        return shards
+
+
+def shard_name(index: int, fmt: str) -> str:
+    """
+    File name of a shard.
+
+    Args:
+        index: Shard index
+        fmt: Shard file format
+
+    Returns:
+        Name of the shard's file inside the dataset directory
+    """
+    return f"shard-{index:05d}.{FORMATS[fmt]}"
+
+
+def make_shard(spec: DatasetSpec, shard: Tuple, directory: str) -> Dict[str, object]:
+    """
+    Generate, solve and write one shard.
+
+    Args:
+        spec: The dataset spec
+        shard: One of the tuples returned by ``spec.shards()``
+        directory: Dataset directory
+
+    Returns:
+        The shard's manifest entry
+    """
+    index, name, (w, h), count, key = shard
+    # Seeds depend on the base seed and the shard's place in the spec, nothing else
+    generator_seed, solver_seed, maze_seed = np.random.SeedSequence(spec.seed, spawn_key=key).spawn(3)
+    m = Maze(seed=maze_seed, stats=False)
+    m.generator = GENERATORS[name](w, h, seed=generator_seed)
+    if spec.solver is not None:
+        m.solver = SOLVERS[spec.solver](seed=solver_seed)
+
+    records = []
+    for _ in range(count):
+        if m.solver is None:
+            m.generate()
+            m.generate_entrances()
+        else:
+            m.generate_and_solve(spec.clear)
+        solution = m.solutions[0] if m.solutions else None
+        records.append((m.grid, m.start, m.end, solution))
+
+    # Written under a temporary name first, so a shard file only exists once it is complete
+    path = os.path.join(directory, shard_name(index, spec.fmt))
+    partial = path + ".partial"
+    if spec.fmt == "corpus":
+        with CorpusWriter(partial) as writer:
+            for grid, start, end, solution in records:
+                writer.add(grid, start, end, None if solution is None else [solution])
+    else:
+        with open(partial, "wb") as f:
+            np.savez_compressed(f, **pack_npz(records))
+    os.replace(partial, path)
+
+    return {
+        "index": index,
+        "file": os.path.basename(path),
+        "generator": name,
+        "size": [w, h],
+        "count": count,
+        "seed_key": list(key),
+        "bytes": os.path.getsize(path),
+        "sha256": checksum(path),
+    }
+
+
+def pack_npz(records: List[Record]) -> Dict[str, np.ndarray]:
+    """
+    Arrays of an .npz shard.
+
+    Args:
+        records: Maze records, all with grids of the same shape
+
+    Returns:
+        ``grids`` (n, H, W) int8, ``starts`` and ``ends`` (n, 2) int32,
+        ``solution_lengths`` (n,) int64 (-1 without a solution) and
+        ``solutions``, the flat grid indices of every solution back to back
+    """
+    grids = np.stack([grid for grid, _, _, _ in records])
+    width = grids.shape[2]
+    lengths = np.array([-1 if s is None else len(s) for _, _, _, s in records], dtype=np.int64)
+    cells = [cell for _, _, _, s in records if s for cell in s]
+    flat = np.array([r * width + c for r, c in cells], dtype=np.int64)
+    return {
+        "grids": grids,
+        "starts": np.array([start for _, start, _, _ in records], dtype=np.int32),
+        "ends": np.array([end for _, _, end, _ in records], dtype=np.int32),
+        "solution_lengths": lengths,
+        "solutions": flat,
+    }
+
+
+def read_shard(path: str) -> Iterator[Record]:
+    """
+    Iterate over the mazes of a shard.
+
+    Args:
+        path: Path of a .corpus or .npz shard
+
+    Yields:
+        (grid, start, end, solution) tuples; solution is None if none was stored
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            grids, starts, ends = data["grids"], data["starts"], data["ends"]
+            lengths, flat = data["solution_lengths"], data["solutions"]
+        width = grids.shape[2]
+        pos = 0
+        for grid, start, end, length in zip(grids, starts.tolist(), ends.tolist(), lengths.tolist()):
+            solution = None
+            if length >= 0:
+                solution = [divmod(int(i), width) for i in flat[pos:pos + length]]
+                pos += length
+            yield grid, tuple(start), tuple(end), solution
+    else:
+        corpus = CorpusReader(path)
+        for i in range(len(corpus)):
+            start, end = corpus.entrances(i)
+            solutions = corpus.solutions(i)
+            yield corpus.grid(i), start, end, solutions[0] if solutions else None
+
+
+def read_dataset(directory: str) -> Iterator[Record]:
+    """
+    Iterate over every maze of a dataset, shard by shard.
+
+    Args:
+        directory: Dataset directory
+
+    Yields:
+        (grid, start, end, solution) tuples
+    """
+    for entry in load_manifest(directory)["shards"]:
+        yield from read_shard(os.path.join(directory, entry["file"]))
+
+
+def checksum(path: str) -> str:
+    """
+    SHA-256 digest of a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, object]]:
+    """
+    Read a dataset's manifest.
+
+    Args:
+        directory: Dataset directory
+
+    Returns:
+        The manifest, or None if the directory has none yet
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(directory: str, spec: DatasetSpec, entries: Dict[int, Dict[str, object]], total: int) -> None:
+    """
+    Atomically write a dataset's manifest.
+
+    Args:
+        directory: Dataset directory
+        spec: The dataset spec
+        entries: Manifest entries of the finished shards by index
+        total: Number of shards in the spec
+    """
+    manifest = {
+        "spec": spec.to_dict(),
+        "shard_count": total,
+        "complete": len(entries) == total,
+        "shards": [entries[i] for i in sorted(entries)],
+    }
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".partial", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".partial", path)
+
+
+def build(spec: DatasetSpec, directory: str, workers: Optional[int] = None) -> Dict[str, object]:
+    """
+    Build a dataset, or finish building one that was interrupted.
+
+    Shards listed in the manifest whose files are still there with the
+    recorded size are kept; every other shard is (re)made. Shard files only
+    appear once complete, so a shard cut off halfway is simply made again.
+
+    Args:
+        spec: The dataset spec
+        directory: Dataset directory, created if missing
+        workers: Number of worker processes, defaults to the CPU count;
+            1 builds everything in the current process
+
+    Returns:
+        The final manifest
+
+    Raises:
+        ValueError: If the directory holds a dataset built from another spec
+    """
+    os.makedirs(directory, exist_ok=True)
+    shards = spec.shards()
+    entries = {}
+    manifest = load_manifest(directory)
+    if manifest is not None:
+        if manifest["spec"] != spec.to_dict():
+            raise ValueError(f"{directory} holds a dataset built from a different spec")
+        for entry in manifest["shards"]:
+            path = os.path.join(directory, entry["file"])
+            if os.path.exists(path) and os.path.getsize(path) == entry["bytes"]:
+                entries[entry["index"]] = entry
+
+    todo = [shard for shard in shards if shard[0] not in entries]
+    write_manifest(directory, spec, entries, len(shards))
+    if workers == 1:
+        for shard in todo:
+            entries[shard[0]] = make_shard(spec, shard, directory)
+            write_manifest(directory, spec, entries, len(shards))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(make_shard, spec, shard, directory) for shard in todo]
+            # Record shards as they finish, so an interruption loses as little as possible
+            for future in as_completed(futures):
+                entry = future.result()
+                entries[entry["index"]] = entry
+                write_manifest(directory, spec, entries, len(shards))
+    return load_manifest(directory)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Build a sharded maze dataset.")
+    parser.add_argument("directory", help="dataset directory (resumed if it already holds this dataset)")
+    parser.add_argument("--generators", nargs="+", default=["all"],
+                        help=f"generator names or 'all' ({', '.join(GENERATORS)})")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[25], help="maze sizes in cells per side")
+    parser.add_argument("--solver", help=f"solver name, none to store mazes only ({', '.join(SOLVERS)})")
+    parser.add_argument("--count", type=int, default=1000, help="mazes per generator and size")
+    parser.add_argument("--seed", type=int, default=0, help="base seed")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="mazes per shard")
+    parser.add_argument("--format", choices=list(FORMATS), default="corpus", help="shard file format")
+    parser.add_argument("--keep-dead-ends", action="store_true", help="store solutions without clearing them")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    solver = None if args.solver in (None, "none") else args.solver
+    try:
+        spec = DatasetSpec(args.generators, args.sizes, solver, args.count, args.seed,
+                           args.shard_size, args.format, not args.keep_dead_ends)
+        manifest = build(spec, args.directory, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{len(manifest['shards'])} of {manifest['shard_count']} shards in {args.directory}, "
+          f"{sum(entry['count'] for entry in manifest['shards'])} mazes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Event streams recorded while mazes are generated and solved.
+
+A generator or solver whose ``events`` attribute holds an EventStream
+reports what it does as it goes: every grid position a generator carves,
+every cell a solver reaches or walks back from, and finally the solution
+it returns. Each event is a flat grid index plus an event code; events are
+buffered in a plain list and handed out in NumPy chunks, so an animation
+can replay the real algorithm by writing whole chunks into an image.
+
+Algorithms only pay for this when a stream is attached; with ``events``
+left at None the hot loops skip it after a single check.
+
+Example:
+    m.generator.events = EventStream()
+    m.generate()
+    for indices, codes in m.generator.events:
+        ...
+"""
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+try:
+    from constants import EVENT_CHUNK
+except ImportError:
+    # Fallback if constants module is not available
+    EVENT_CHUNK = 1 << 16
+
+# Event codes
+CARVE = 1    # A generator turned a grid position into a passage
+VISIT = 2    # A solver reached a cell
+RETREAT = 3  # A solver walked back from a cell, or ruled it out
+PATH = 4     # A grid position on the solution a solver returned
+
+# Number of bits the event code takes up in a buffered event
+CODE_BITS = 3
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+
+
+class EventStream:
+    """
+    Buffered stream of (flat grid index, event code) events.
+
+    Attributes:
+        chunk: Number of events buffered before they are turned into a chunk
+        sink: Called with every chunk as (int64 indices, uint8 codes) as soon
+            as it is complete; chunks are kept in ``chunks`` if None
+        chunks: Completed chunks kept when there is no sink
+        count: Number of events emitted so far
+    """
+
+    def __init__(self, chunk: int = EVENT_CHUNK, sink: Optional[Callable[[np.ndarray, np.ndarray], None]] = None) -> None:
+        """
+        Create an empty stream.
+
+        Args:
+            chunk: Number of events per chunk (must be positive)
+            sink: Consumer of completed chunks, None to keep them
+
+        Raises:
+            ValueError: If chunk is not a positive integer
+        """
+        if chunk <= 0:
+            raise ValueError(f"Event chunk size must be a positive integer, got chunk={chunk}")
+        self.chunk = int(chunk)
+        self.sink = sink
+        self.chunks: List[Chunk] = []
+        self.count = 0
+        # Index and code packed into one int, so emitting is a single append
+        self._buffer: List[int] = []
+
+    def emit(self, index: int, code: int) -> None:
+        """
+        Record one event.
+
+        Args:
+            index: Flat grid index of the position
+            code: Event code (CARVE, VISIT, RETREAT or PATH)
+        """
+        self._buffer.append(index << CODE_BITS | code)
+        if len(self._buffer) >= self.chunk:
+            self.flush()
+
+    def extend(self, indices: np.ndarray, code: int) -> None:
+        """
+        Record one event for each of many positions at once.
+
+        Args:
+            indices: Flat grid indices, in the order the events happened
+            code: Event code shared by all of them
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(indices) == 0:
+            return
+        self.flush()
+        self._push(indices, np.full(len(indices), code, dtype=np.uint8))
+
+    def flush(self) -> None:
+        """Turn the buffered events into a chunk."""
+        if not self._buffer:
+            return
+        packed = np.array(self._buffer, dtype=np.int64)
+        self._buffer = []
+        self._push(packed >> CODE_BITS, (packed & ((1 << CODE_BITS) - 1)).astype(np.uint8))
+
+    def _push(self, indices: np.ndarray, codes: np.ndarray) -> None:
+        # Hand a completed chunk over to the sink, or keep it
+        self.count += len(indices)
+        if self.sink is None:
+            self.chunks.append((indices, codes))
+        else:
+            self.sink(indices, codes)
+
+    def arrays(self) -> Chunk:
+        """
+        All kept events as two arrays.
+
+        Returns:
+            (int64 flat indices, uint8 codes) tuple, in event order
+        """
+        self.flush()
+        if not self.chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+        indices, codes = zip(*self.chunks)
+        return np.concatenate(indices), np.concatenate(codes)
+
+    def clear(self) -> None:
+        """Drop every buffered and kept event."""
+        self._buffer = []
+        self.chunks = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count + len(self._buffer)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        self.flush()
+        return iter(self.chunks)
@@ -0,0 +1,108 @@
+"""
+Array-backed set of integer ids with O(1) membership, removal and sampling.
+
+This module provides the bookkeeping generators use to keep track of the
+cells that still have to be added to the maze.
+"""
+import numpy as np
+
+from disjoint_set import index_dtype
+
+
+class IndexedSet:
+    """
+    Set of ids drawn from 0..n-1 stored as a dense item array plus a position table.
+
+    ``items[:size]`` holds the members in no particular order and
+    ``where[x]`` holds the position of x in ``items`` (or -1 when x is not a
+    member). Removal swaps the last member into the freed slot, so adding,
+    removing and picking a uniformly random member are all O(1).
+
+    Attributes:
+        items: Members of the set packed at the front of the array
+        where: Position of every id in ``items``, -1 for non-members
+        size: Number of members
+    """
+
+    def __init__(self, n: int) -> None:
+        """
+        Create an empty set over the ids 0..n-1.
+
+        Args:
+            n: Number of distinct ids (must be positive)
+
+        Raises:
+            ValueError: If n is not a positive integer
+        """
+        if n <= 0:
+            raise ValueError(f"Indexed set size must be a positive integer, got n={n}")
+        dtype = index_dtype(n)
+        self.items = np.empty(n, dtype=dtype)
+        self.where = np.empty(n, dtype=dtype)
+        self.where.fill(-1)
+        self.size = 0
+        self._items = memoryview(self.items)
+        self._where = memoryview(self.where)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, x: int) -> bool:
+        return self._where[x] >= 0
+
+    def fill(self, ids: np.ndarray) -> None:
+        """
+        Replace the contents of the set with the given distinct ids.
+
+        Args:
+            ids: 1D array of distinct ids
+        """
+        self.where.fill(-1)
+        self.size = len(ids)
+        self.items[:self.size] = ids
+        self.where[ids] = np.arange(self.size)
+
+    def add(self, x: int) -> None:
+        """
+        Add an id to the set (no-op if already present).
+
+        Args:
+            x: Id to add
+        """
+        if self._where[x] >= 0:
+            return
+        self._items[self.size] = x
+        self._where[x] = self.size
+        self.size += 1
+
+    def discard(self, x: int) -> None:
+        """
+        Remove an id from the set (no-op if absent) by swapping in the last member.
+
+        Args:
+            x: Id to remove
+        """
+        where = self._where
+        i = where[x]
+        if i < 0:
+            return
+        self.size -= 1
+        last = self._items[self.size]
+        self._items[i] = last
+        where[last] = i
+        where[x] = -1
+
+    def item(self, i: int) -> int:
+        """
+        Return the member stored at position i.
+
+        Picking ``item(k)`` for a uniform k in [0, len(self)) samples a
+        uniformly random member.
+
+        Args:
+            i: Position in [0, len(self))
+
+        Returns:
+            The id stored at that position
+        """
+        return self._items[i]
@@ -4,14 +4,19 @@ Maze class for generating and solving mazes.
 This module provides the main Maze class that coordinates maze generation
 and solving using various algorithms.
 """
-from random import randrange
-from typing import Optional, Tuple, List
+import io
+from typing import Callable, Optional, Tuple, List, TextIO, BinaryIO, Union
 import numpy as np
+from adjacency import build_adjacency
+from events import PATH
+from rng import RandomBuffer, Seed
+from stats import NullStats, Stats
+from tree_index import TreeIndex
 try:
     from constants import (
         MIN_GRID_SIZE, MIN_ENTRANCE_DISTANCE, MAX_ENTRANCE_ATTEMPTS,
         MAX_END_POINT_ATTEMPTS, CHAR_WALL, CHAR_PASSAGE, CHAR_START,
-        CHAR_END, CHAR_SOLUTION
+        CHAR_END, CHAR_SOLUTION, RENDER_CHUNK_BYTES
     )
 except ImportError:
     # Fallback if constants module is not available
@@ -24,6 +29,7 @@ except ImportError:
     CHAR_START = "S"
     CHAR_END = "E"
     CHAR_SOLUTION = "#"
+    RENDER_CHUNK_BYTES = 1 << 20
 
 
 class Maze:
@@ -42,10 +48,29 @@ class Maze:
         solver: The maze solving algorithm to use
         solutions: List of solution paths found by the solver
         clear: Whether to clear redundant paths from solutions
+        adjacency: Open-direction mask of the grid, built on first use and
+            shared by every solver run on the same grid
+        array_factory: Called with (shape, dtype) to create the grid, the
+            adjacency mask and solver buffers (e.g. ``utils.memmap_factory()``
+            for mazes larger than RAM), None to allocate them in memory
+        rng: Random source used to place entrances
+        tree_index: Path query index of the grid (see tree_index.py), built
+            on first use; answers distance and path queries between any two
+            cells of a perfect maze without solving it again
+        stats: Timings and work counters of every generate, adjacency,
+            entrances, solve and clear phase run so far (see stats.py)
     """
     
-    def __init__(self) -> None:
-        """Initialize a new Maze instance with default values."""
+    def __init__(self, seed: Seed = None, stats: bool = True) -> None:
+        """
+        Initialize a new Maze instance with default values.
+        
+        Args:
+            seed: Seed or np.random.Generator for placing entrances, None for
+                fresh OS entropy (generators and solvers take their own seeds)
+            stats: Record phase timings and counters; False installs a
+                NullStats that records nothing
+        """
         # Initialize instance variables
         self.generator = None
         self.grid = None
@@ -54,6 +79,69 @@ class Maze:
         self.solver = None
         self.solutions = None
         self.clear = True
+        self.rng = RandomBuffer(seed)
+        self.array_factory: Optional[Callable[[Tuple[int, ...], type], np.ndarray]] = None
+        self._adjacency = None
+        self._adjacency_grid = None
+        self._tree_index = None
+        self._tree_index_grid = None
+        self.stats = Stats() if stats else NullStats()
+
+    @property
+    def adjacency(self) -> Optional[np.ndarray]:
+        """
+        Open-direction mask of the current grid, built once and cached.
+
+        The cache is keyed on the grid object, so assigning a new grid or
+        generating a new maze invalidates it.
+
+        Returns:
+            uint8 array with the grid's shape, or None if there is no grid
+        """
+        if self.grid is None:
+            return None
+        if self._adjacency is None or self._adjacency_grid is not self.grid:
+            with self.stats.phase("adjacency"):
+                out = None if self.array_factory is None else self.array_factory(self.grid.shape, np.uint8)
+                self._adjacency = build_adjacency(self.grid, out)
+                self._adjacency_grid = self.grid
+        return self._adjacency
+
+    @property
+    def tree_index(self) -> Optional[TreeIndex]:
+        """
+        Path query index of the current grid, built once and cached.
+
+        Like the adjacency mask, the cache is keyed on the grid object.
+
+        Returns:
+            The grid's TreeIndex, or None if there is no grid
+
+        Raises:
+            ValueError: If the grid's passages contain a loop
+        """
+        if self.grid is None:
+            return None
+        if self._tree_index is None or self._tree_index_grid is not self.grid:
+            self._tree_index = TreeIndex.build(self.grid, self.adjacency)
+            self._tree_index_grid = self.grid
+        return self._tree_index
+
+    @tree_index.setter
+    def tree_index(self, index: TreeIndex) -> None:
+        """
+        Attach a prebuilt (e.g. loaded) index to the current grid.
+
+        Args:
+            index: Index built for a grid of the same shape
+
+        Raises:
+            ValueError: If there is no grid or the index does not match its shape
+        """
+        if self.grid is None or tuple(self.grid.shape) != index.shape:
+            raise ValueError(f"Tree index of shape {index.shape} does not match the maze grid")
+        self._tree_index = index
+        self._tree_index_grid = self.grid
 
     def generate(self) -> None:
         """
@@ -65,10 +153,16 @@ class Maze:
         # Validate generator is set
         if self.generator is None:
             raise ValueError("Generator must be set before generating maze")
-        # Generate the maze grid
-        self.grid = self.generator.generate()
+        # Generate the maze grid, straight into the factory's array if there is one
+        if self.array_factory is not None:
+            self.generator.factory = self.array_factory
+        with self.stats.phase("generate"):
+            self.grid = self.generator.generate()
         if self.grid is None:
             raise ValueError("Generator failed to generate a maze")
+        if self.stats.enabled:
+            # Counted by the generator as it carves (e.g. cells_carved), never by a pass over the grid
+            self.stats.count(**self.generator.counters)
         # Reset start and end points
         self.start = None
         self.end = None
@@ -87,12 +181,14 @@ class Maze:
             max_attempts: Maximum number of attempts to find valid entrances
         """
         attempts = 0
-        while attempts < max_attempts:
-            self.inner_entrances()
-            # If start and end points are far enough apart, we're done
-            if abs(self.start[0] - self.end[0]) + abs(self.start[1] - self.end[1]) >= MIN_ENTRANCE_DISTANCE:
-                return
-            attempts += 1
+        with self.stats.phase("entrances"):
+            while attempts < max_attempts:
+                self.inner_entrances()
+                attempts += 1
+                # If start and end points are far enough apart, we're done
+                if abs(self.start[0] - self.end[0]) + abs(self.start[1] - self.end[1]) >= MIN_ENTRANCE_DISTANCE:
+                    break
+        self.stats.count(attempts=attempts)
         # If we couldn't find suitable entrances after max_attempts, use the last generated ones
         # This prevents infinite recursion in edge cases
 
@@ -110,12 +206,12 @@ class Maze:
         if H < MIN_GRID_SIZE or W < MIN_GRID_SIZE:
             raise ValueError(f"Grid too small for entrances: {H}x{W}, need at least {MIN_GRID_SIZE}x{MIN_GRID_SIZE}")
         # Generate start point (must be on odd row/column indices)
-        self.start = (randrange(1, H, 2), randrange(1, W, 2))
+        self.start = (self.rng.randrange(1, H, 2), self.rng.randrange(1, W, 2))
         # Generate end point, ensuring it's different from start
         attempts = 0
-        end = (randrange(1, H, 2), randrange(1, W, 2))
+        end = (self.rng.randrange(1, H, 2), self.rng.randrange(1, W, 2))
         while end == self.start and attempts < MAX_END_POINT_ATTEMPTS:
-            end = (randrange(1, H, 2), randrange(1, W, 2))
+            end = (self.rng.randrange(1, H, 2), self.rng.randrange(1, W, 2))
             attempts += 1
         self.end = end
 
@@ -148,10 +244,23 @@ class Maze:
         if self.start is None or self.end is None:
             raise ValueError("Start and end points must be set before solving")
         # Solve the maze
-        self.solutions = self.solver.solve(self.grid, self.start, self.end)
+        if self.array_factory is not None:
+            self.solver.factory = self.array_factory
+        # Build the adjacency mask first so it is timed as its own phase
+        adjacency = self.adjacency
+        with self.stats.phase("solve"):
+            self.solutions = self.solver.solve(self.grid, self.start, self.end, adjacency)
+        self.stats.count(peak_overlay_bytes=self.solver.overlay_nbytes(),
+                         path_length=len(self.solutions[0]) if self.solutions else 0,
+                         **self.solver.counters)
         # Optionally clear solutions if set to True
         if clear and self.solutions:
-            self.solutions = self.solver.clear_solutions(self.solutions)
+            with self.stats.phase("clear"):
+                self.solutions = self.solver.clear_solutions(self.solutions)
+        # A solver recording events gets the first solution kept, start and end included
+        if self.solver.events is not None and self.solutions:
+            cells = [self.start] + list(self.solutions[0]) + [self.end]
+            self.solver.events.extend([r * self.grid.shape[1] + c for r, c in cells], PATH)
 
     def tostring(self, entrances: bool = False, solutions: bool = False) -> str:
         """
@@ -166,29 +275,84 @@ class Maze:
         """
         if self.grid is None:
             return ""
-        txt = []
-        # Convert each row of the grid to string representation
-        for row in self.grid:
-            txt.append("".join([CHAR_WALL if cell else CHAR_PASSAGE for cell in row]))
-        # Mark start and end points if enabled
+        txt = io.StringIO()
+        self.write(txt, entrances, solutions)
+        return txt.getvalue()
+
+    def write(self, fp: Union[TextIO, BinaryIO], entrances: bool = False, solutions: bool = False,
+              chunk_rows: Optional[int] = None) -> None:
+        """
+        Stream the string representation of the maze to a file object.
+        
+        Rows are rendered a block at a time into a NumPy character buffer, so
+        even very large mazes can be written without building the whole
+        string in memory. The output is exactly what ``tostring`` returns.
+        
+        Args:
+            fp: Text or binary file object to write to
+            entrances: Whether to mark start (S) and end (E) positions
+            solutions: Whether to mark solution paths (#)
+            chunk_rows: Number of grid rows rendered per block, sized to
+                roughly RENDER_CHUNK_BYTES if not given
+        """
+        if self.grid is None:
+            return
+        H, W = self.grid.shape
+        if chunk_rows is None:
+            chunk_rows = max(1, RENDER_CHUNK_BYTES // (W + 1))
+        text = isinstance(fp, io.TextIOBase)
+
+        # Flat positions to overwrite, in the order they are applied
+        marks = []
         if entrances and self.start and self.end:
-            r, c = self.start
-            txt[r] = txt[r][:c] + CHAR_START + txt[r][c + 1 :]
-            r, c = self.end
-            txt[r] = txt[r][:c] + CHAR_END + txt[r][c + 1 :]
-        # Mark solutions if enabled
+            marks.append((self._flat_cells([self.start]), ord(CHAR_START)))
+            marks.append((self._flat_cells([self.end]), ord(CHAR_END)))
+        footer = None
         if solutions and self.solutions and len(self.solutions) > 0:
             # Mark all solution paths (typically just the first one)
-            for solution_path in self.solutions:
-                if solution_path:  # Check if solution path is not empty
-                    for r, c in solution_path:
-                        if 0 <= r < len(txt) and 0 <= c < len(txt[r]):
-                            txt[r] = txt[r][:c] + CHAR_SOLUTION + txt[r][c + 1 :]
-            # Add a line indicating the length of the solution
-            len_solutions = sum(row.count(CHAR_SOLUTION) for row in txt)
-            txt.append(f"Final length of the solution: {len_solutions}")
-        # Join rows with newline characters
-        return "\n".join(txt)
+            cells = self._flat_cells([cell for path in self.solutions if path for cell in path])
+            marks.append((cells, ord(CHAR_SOLUTION)))
+            # The length of the solution is the number of distinct cells it covers
+            footer = f"\nFinal length of the solution: {len(cells)}"
+
+        wall, passage = ord(CHAR_WALL), ord(CHAR_PASSAGE)
+        for r0 in range(0, H, chunk_rows):
+            r1 = min(H, r0 + chunk_rows)
+            # Map the block of rows to characters in one operation, with a newline column
+            block = np.empty((r1 - r0, W + 1), dtype=np.uint8)
+            block[:, :W] = np.where(self.grid[r0:r1] != 0, wall, passage)
+            block[:, W] = ord("\n")
+            # Overlay the marks that fall inside this block
+            for cells, char in marks:
+                lo, hi = np.searchsorted(cells, (r0 * W, r1 * W))
+                rows, cols = np.divmod(cells[lo:hi] - r0 * W, W)
+                block[rows, cols] = char
+            data = block.reshape(-1)
+            if r1 == H:
+                data = data[:-1]
+            fp.write(data.tobytes().decode("ascii") if text else data.tobytes())
+        if footer is not None:
+            fp.write(footer if text else footer.encode("ascii"))
+
+    def _flat_cells(self, cells: List[Tuple[int, int]]) -> np.ndarray:
+        """
+        Convert (row, column) cells to sorted, distinct flat grid indices.
+        
+        Cells outside the grid are ignored.
+        
+        Args:
+            cells: List of (row, column) tuples
+            
+        Returns:
+            Sorted 1D int64 array of flat indices
+        """
+        H, W = self.grid.shape
+        if not cells:
+            return np.empty(0, dtype=np.int64)
+        rc = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        inside = (rc[:, 0] >= 0) & (rc[:, 0] < H) & (rc[:, 1] >= 0) & (rc[:, 1] < W)
+        rc = rc[inside]
+        return np.unique(rc[:, 0] * W + rc[:, 1])
 
     def __str__(self) -> str:
         """
@@ -0,0 +1,321 @@
+"""
+Peak-memory benchmark of every generator and solver across maze sizes.
+
+Every measurement runs in a freshly spawned process, so the resident set
+high-water mark (``ru_maxrss``) belongs to that one run alone. Inside it
+the measured step runs under ``tracemalloc``: generators are measured
+generating a maze, solvers solving a maze made beforehand (with its
+entrances and adjacency mask, which are not counted). The algorithm
+first runs once, untraced, on a tiny maze, so lazy imports and other
+one-time costs are not charged to small sizes. Each record holds
+the tracemalloc peak, what was still allocated afterwards (the grid or
+the solutions), the RSS peak over the process baseline, bytes per cell
+and the number of positions in the returned solutions, so a solver whose
+paths blow up with ``clear=False`` stands out. Runs that exceed the
+timeout are stopped and reported as such.
+
+tracemalloc slows allocation-heavy code down considerably; use
+benchmark.py for timings.
+
+Example:
+    python memory_benchmark.py --sizes 25 64 256 1024 4096 --json memory.json --csv memory.csv
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import multiprocessing.connection
+import sys
+import tracemalloc
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; RSS peaks are then reported as None
+    resource = None
+
+from maze import Maze
+from registry import GENERATORS, SOLVERS, lookup
+
+# Maze sizes (cells per side) measured by default
+DEFAULT_SIZES = [25, 64, 256, 1024, 4096]
+
+# Seconds a single run may take before it is stopped
+DEFAULT_TIMEOUT = 600.0
+
+# Size of the untraced maze every algorithm runs on first, so one-time costs
+# (imports, caches, pooled buffers) are not charged to the measured run
+WARMUP_SIZE = 4
+
+# Columns of the CSV report, in order
+FIELDS = ("kind", "algorithm", "size", "clear", "status", "tracemalloc_peak", "tracemalloc_retained",
+          "rss_peak", "rss_baseline", "bytes_per_cell", "solution_cells", "seconds")
+
+
+def max_rss() -> Optional[int]:
+    """
+    Resident set high-water mark of the current process.
+
+    Returns:
+        Bytes, or None if the platform does not report it
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def warm_up(kind: str, name: str, clear: Optional[bool], maze_generator: str) -> None:
+    """
+    Run an algorithm once, untraced, on a WARMUP_SIZE maze.
+
+    Args:
+        kind: "generator" or "solver"
+        name: Algorithm name
+        clear: Solution clearing setting of solver runs
+        maze_generator: Generator class name of the maze solvers run on
+    """
+    m = Maze(seed=0, stats=False)
+    m.generator = GENERATORS[name if kind == "generator" else maze_generator](WARMUP_SIZE, WARMUP_SIZE, seed=0)
+    m.generate()
+    if kind == "solver":
+        m.generate_entrances()
+        m.solver = SOLVERS[name](seed=0)
+        m.solve(clear)
+
+
+def measure(task: Tuple[str, str, int, bool, str, np.random.SeedSequence]) -> Dict[str, object]:
+    """
+    Measure one generator or solver run in the current process.
+
+    Args:
+        task: (kind, algorithm name, size, clear, maze generator name, seed)
+            tuple; kind is "generator" or "solver", solvers run on a maze
+            made by the maze generator and clear is None for generators
+
+    Returns:
+        Dictionary with the task and its memory figures in bytes
+    """
+    kind, name, size, clear, maze_generator, seed = task
+    warm_up(kind, name, clear, maze_generator)
+    generator_seed, solver_seed, maze_seed = seed.spawn(3)
+    m = Maze(seed=maze_seed, stats=False)
+    if kind == "generator":
+        m.generator = GENERATORS[name](size, size, seed=generator_seed)
+    else:
+        m.generator = GENERATORS[maze_generator](size, size, seed=generator_seed)
+        m.generate()
+        m.generate_entrances()
+        m.adjacency  # Built up front so only the solver's own state is measured
+        m.solver = SOLVERS[name](seed=solver_seed)
+    rss_baseline = max_rss()
+
+    tracemalloc.start()
+    t0 = perf_counter()
+    if kind == "generator":
+        m.generate()
+    else:
+        m.solve(clear)
+    seconds = perf_counter() - t0
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_peak = max_rss()
+    return {
+        "kind": kind,
+        "algorithm": name,
+        "size": size,
+        "clear": clear,
+        "status": "ok",
+        "tracemalloc_peak": peak,
+        "tracemalloc_retained": retained,
+        "rss_peak": None if rss_peak is None else rss_peak - rss_baseline,
+        "rss_baseline": rss_baseline,
+        "bytes_per_cell": peak / (size * size),
+        "solution_cells": sum(len(path) for path in m.solutions) if m.solutions else 0,
+        "seconds": seconds,
+    }
+
+
+def _child(task, conn) -> None:
+    # Entry point of a measuring process: send back the record or the error
+    try:
+        conn.send(measure(task))
+    except BaseException as e:
+        conn.send({"status": f"error: {type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_isolated(tasks: List[Tuple], workers: int = 1, timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, object]]:
+    """
+    Run every task in its own spawned process.
+
+    Args:
+        tasks: Tasks accepted by measure
+        workers: Number of measuring processes alive at once; runs
+            measured side by side compete for memory bandwidth but not for
+            address space, so figures stay per run
+        timeout: Seconds after which a run is stopped and reported as a timeout
+
+    Returns:
+        One record per task, in task order
+    """
+    context = multiprocessing.get_context("spawn")
+    records: List[Optional[Dict[str, object]]] = [None] * len(tasks)
+    pending = list(enumerate(tasks))
+    running = {}
+    while pending or running:
+        # Start runs until every worker slot is busy
+        while pending and len(running) < workers:
+            i, task = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_child, args=(task, sender), daemon=True)
+            process.start()
+            sender.close()
+            running[i] = (process, receiver, monotonic() + timeout)
+
+        ready = multiprocessing.connection.wait([receiver for _, receiver, _ in running.values()], timeout=0.5)
+        for i, (process, receiver, deadline) in list(running.items()):
+            status = None
+            if receiver in ready:
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    # The process died without sending anything (e.g. killed for running out of memory)
+                    process.join()
+                    result = {"status": f"crashed (exit code {process.exitcode})"}
+                status = result
+            elif monotonic() > deadline:
+                process.kill()
+                status = {"status": "timeout"}
+            if status is None:
+                continue
+            process.join()
+            receiver.close()
+            del running[i]
+            kind, name, size, clear = tasks[i][:4]
+            records[i] = {field: None for field in FIELDS}
+            records[i].update({"kind": kind, "algorithm": name, "size": size, "clear": clear})
+            records[i].update(status)
+    return records
+
+
+def build_tasks(generators: List[str], solvers: List[str], sizes: List[int], clear: List[bool],
+                maze_generator: str, seed: Optional[int] = None) -> List[Tuple]:
+    """
+    List every run of the benchmark, smallest sizes first.
+
+    Args:
+        generators: Generator class names
+        solvers: Solver class names
+        sizes: Maze sizes (cells per side)
+        clear: Solution clearing settings every solver is measured with
+        maze_generator: Generator class name of the mazes solvers run on
+        seed: Root seed every run's seed is spawned from, None for fresh OS entropy
+
+    Returns:
+        Tasks accepted by measure
+    """
+    tasks = []
+    for size in sizes:
+        tasks += [("generator", name, size, None, maze_generator) for name in generators]
+        tasks += [("solver", name, size, c, maze_generator) for name in solvers for c in clear]
+    # One independent seed per run, fixed by its position in the list
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    return [task + (task_seed,) for task, task_seed in zip(tasks, seeds)]
+
+
+def write_json(path: str, records: List[Dict[str, object]]) -> None:
+    """
+    Write the records as a JSON array.
+
+    Args:
+        path: Output file path
+        records: Records returned by run_isolated
+    """
+    with open(path, "w") as f:
+        json.dump(records, f, indent=2)
+
+
+def write_csv(path: str, records: List[Dict[str, object]]) -> None:
+    """
+    Write the records as CSV, one row per run.
+
+    Args:
+        path: Output file path
+        records: Records returned by run_isolated
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def _mib(n: Optional[int]) -> str:
+    # Format a byte count in MiB, or a dash if it is missing
+    return "-" if n is None else f"{n / (1 << 20):.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Measure peak memory of maze generators and solvers.")
+    parser.add_argument("--generators", nargs="+", default=["all"],
+                        help=f"generator names, 'all' or 'none' ({', '.join(GENERATORS)})")
+    parser.add_argument("--solvers", nargs="+", default=["all"],
+                        help=f"solver names, 'all' or 'none' ({', '.join(SOLVERS)})")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help="maze sizes in cells per side")
+    parser.add_argument("--clear", choices=["yes", "no", "both"], default="both",
+                        help="measure solvers with cleared solutions, raw ones, or both")
+    parser.add_argument("--maze", default="BacktrackingGenerator",
+                        help="generator of the mazes solvers are measured on")
+    parser.add_argument("--workers", type=int, default=1, help="measuring processes alive at once")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per run")
+    parser.add_argument("--seed", type=int, help="root seed for reproducible runs")
+    parser.add_argument("--json", dest="json_path", help="write the records as JSON to this file")
+    parser.add_argument("--csv", dest="csv_path", help="write the records as CSV to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        generators = [] if args.generators == ["none"] else [cls.__name__ for cls in lookup(GENERATORS, args.generators)]
+        solvers = [] if args.solvers == ["none"] else [cls.__name__ for cls in lookup(SOLVERS, args.solvers)]
+        maze_generator = lookup(GENERATORS, [args.maze])[0].__name__
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers <= 0 or args.timeout <= 0 or any(size <= 0 for size in args.sizes):
+        parser.error("sizes, workers and timeout must be positive")
+
+    clear = {"yes": [True], "no": [False], "both": [True, False]}[args.clear]
+    tasks = build_tasks(generators, solvers, args.sizes, clear, maze_generator, args.seed)
+    records = run_isolated(tasks, args.workers, args.timeout)
+    if args.json_path:
+        write_json(args.json_path, records)
+    if args.csv_path:
+        write_csv(args.csv_path, records)
+
+    # Print a compact report in MiB
+    print(f"{'kind':<10}{'algorithm':<22}{'size':>6}{'clear':>7}{'peak MiB':>11}{'kept MiB':>11}"
+          f"{'RSS MiB':>11}{'B/cell':>9}{'solution':>11}  status")
+    for r in records:
+        per_cell = "-" if r["bytes_per_cell"] is None else f"{r['bytes_per_cell']:.1f}"
+        cells = "-" if r["solution_cells"] is None else r["solution_cells"]
+        print(f"{r['kind']:<10}{r['algorithm']:<22}{r['size']:>6}{'-' if r['clear'] is None else str(r['clear']):>7}{_mib(r['tracemalloc_peak']):>11}"
+              f"{_mib(r['tracemalloc_retained']):>11}{_mib(r['rss_peak']):>11}{per_cell:>9}{cells:>11}  {r['status']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
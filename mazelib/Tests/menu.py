@@ -4,12 +4,36 @@ from matplotlib.animation import FuncAnimation
 from maze import Maze  
 from Wilsons import Wilsons  
 from BinaryTree import BinaryTree  
+from Sidewinder import Sidewinder
 from Ellers import Ellers  
 from Tremaux import Tremaux  
 from BackTrackingSolver import BacktrackingSolver  
 from BackTrackingGenerator import BacktrackingGenerator  
 from ShortestPath import ShortestPath
 from RandomMouse import RandomMouse  
+from AStar import AStar
+from BidirectionalBFS import BidirectionalBFS
+from DeadEndFilling import DeadEndFilling
+from events import EventStream, CARVE, VISIT, RETREAT, PATH
+from raster import PALETTE, WALL, PASSAGE, SOLUTION, START, END
+try:
+    from constants import COLOR_VISIT, COLOR_RETREAT, ANIMATION_FRAMES
+except ImportError:
+    # Fallback if constants module is not available
+    COLOR_VISIT = (255, 200, 0)
+    COLOR_RETREAT = (190, 190, 190)
+    ANIMATION_FRAMES = 300
+
+# Colour each event code paints its position with; the last two codes mark the entrances
+START_MARK = PATH + 1
+END_MARK = PATH + 2
+EVENT_COLORS = np.zeros((END_MARK + 1, 3), dtype=np.uint8)
+EVENT_COLORS[CARVE] = PALETTE[PASSAGE]
+EVENT_COLORS[VISIT] = COLOR_VISIT
+EVENT_COLORS[RETREAT] = COLOR_RETREAT
+EVENT_COLORS[PATH] = PALETTE[SOLUTION]
+EVENT_COLORS[START_MARK] = PALETTE[START]
+EVENT_COLORS[END_MARK] = PALETTE[END]
 
 def get_user_input(depth):
     # Function to get user input for maze generation and solving options
@@ -17,13 +41,17 @@ def get_user_input(depth):
         "1": Wilsons,
         "2": BinaryTree,
         "3": Ellers,
-        "4": BacktrackingGenerator
+        "4": BacktrackingGenerator,
+        "5": Sidewinder
     }
     solver_options = {
         "1": RandomMouse,
         "2": Tremaux,
         "3": BacktrackingSolver,
-        "4": ShortestPath
+        "4": ShortestPath,
+        "5": AStar,
+        "6": BidirectionalBFS,
+        "7": DeadEndFilling
     }
     while True:
         print("Select a generator:")
@@ -101,78 +129,52 @@ def generate_solve_and_show():
         m = Maze()
         m.generator = generator
         m.solver = solver
+        # Record what the algorithms do so the animation replays the real thing
+        generator.events = EventStream()
+        solver.events = EventStream()
         m.generate_and_solve(clear=clear)
-        visualize(m.grid, m.start, m.end, m.solutions)
+        visualize(m.grid, m.start, m.end, m.solutions, generator.events, solver.events)
+
+def visualize(grid, start=None, end=None, solutions=None, generation=None, solving=None, frames=ANIMATION_FRAMES):
+    # Replay what the generator and solver recorded on a single image that is updated in place
+    # and blitted, a slice of events per frame; with no events the finished maze is shown as is
+    image = PALETTE[(grid == 0).astype(np.uint8)]
+    chunks = []
+    if generation is not None and len(generation):
+        image[:] = PALETTE[WALL]
+        chunks.append(generation.arrays())
+    # Entrances appear once the maze is built, and are drawn again over the solution at the end
+    entrances = [(p[0] * grid.shape[1] + p[1], code) for p, code in ((start, START_MARK), (end, END_MARK)) if p is not None]
+    if entrances:
+        indices, codes = zip(*entrances)
+        entrances = (np.array(indices, dtype=np.int64), np.array(codes, dtype=np.uint8))
+        chunks.append(entrances)
+    if solving is not None and len(solving):
+        chunks.append(solving.arrays())
+    elif solutions:
+        cells = np.array([cell for path in solutions for cell in path], dtype=np.int64).reshape(-1, 2)
+        chunks.append((cells[:, 0] * grid.shape[1] + cells[:, 1], np.full(len(cells), PATH, dtype=np.uint8)))
+    if entrances:
+        chunks.append(entrances)
+    indices = np.concatenate([c[0] for c in chunks]) if chunks else np.empty(0, dtype=np.int64)
+    codes = np.concatenate([c[1] for c in chunks]) if chunks else np.empty(0, dtype=np.uint8)
 
-def visualize(grid, start=None, end=None, solutions=None):
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_xticks([])
     ax.set_yticks([])
-    
-    # Initialize empty list to store walls (circles representing walls)
-    walls = []
-    
-
-    # Animation function to update plot
-    def animate(frame):
-        i, j = divmod(frame, grid.shape[1])
-        if grid[i, j] == 1:
-            wall = ax.plot(j, i, marker='s', markersize=10, color='black')[0]
-            walls.append(wall)
-        return walls
-
-    # Total frames for animation (equal to number of elements in grid)
-    total_frames = grid.size
-
-    # Create animation object and display it
-    ani = FuncAnimation(fig, animate, frames=total_frames, interval=1, blit=True)
-
-    # Show the grid animation
+    im = ax.imshow(image, interpolation='nearest')
+    pixels = image.reshape(-1, 3)
+    per_frame = max(1, -(-len(indices) // frames))
+
+    # Paint the next slice of events and redraw only the image
+    def update(frame):
+        lo = frame * per_frame
+        pixels[indices[lo:lo + per_frame]] = EVENT_COLORS[codes[lo:lo + per_frame]]
+        im.set_data(image)
+        return [im]
+
+    ani = FuncAnimation(fig, update, frames=max(1, -(-len(indices) // per_frame)), interval=30, blit=True, repeat=False)
     plt.show()
-    
-    # Plot solutions if provided after grid animation
-    fig, ax = plt.subplots(figsize=(10, 10))
-    ax.imshow(grid, cmap=plt.cm.binary, interpolation='nearest')
-    ax.set_xticks([])
-    ax.set_yticks([])
-    
-    # Plot start and end points if provided
-    if start is not None:
-        ax.scatter(start[1], start[0], marker='o', s=50, color='green')
-    if end is not None:
-        ax.scatter(end[1], end[0], marker='o', s=50, color='red')
-    
-    # Plot solutions if provided
-    if solutions is not None and len(solutions) > 0:
-        flat_solutions = [item for sublist in solutions for item in sublist]
-        if flat_solutions:
-            path_x, path_y = zip(*flat_solutions)  
-            
-            # Plot solution before clearing in purple dots
-            ax.plot(path_y, path_x, marker='o', markersize=5, color='purple', linestyle='None')
-            
-            # Plot cleared solution in cyan dots
-            line, = ax.plot([], [], marker='o', markersize=5, color='cyan', linestyle='None')  
-
-            # Initialize dot to show current position in solution array
-            dot, = ax.plot([], [], marker='o', markersize=5, color='black', linestyle='None')
-
-            # Define initialization function for animation
-            def init():
-                line.set_data([], [])
-                dot.set_data([], [])
-                return line, dot
-
-            # Define update function for animation
-            def update(frame):
-                if frame < len(path_x):
-                    line.set_data(path_y[:frame+1], path_x[:frame+1])
-                    dot.set_data([path_y[frame]], [path_x[frame]])
-                return line, dot
-
-            # Create animation object and display it
-            ani = FuncAnimation(fig, update, frames=len(path_x), init_func=init, blit=True, interval=50)
-            plt.show()
 
 if __name__ == '__main__':
     generate_solve_and_show()
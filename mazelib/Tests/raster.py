@@ -0,0 +1,342 @@
+"""
+Headless raster images of mazes.
+
+Turns a maze grid, its entrances and solutions into an image with NumPy
+alone: every grid position becomes a palette label (wall, passage,
+solution, start, end), the labels are blown up to ``scale`` pixels per
+position with ``np.repeat`` and written straight to PNG (zlib only) or
+PPM. Images are produced a block of rows at a time, so memory stays
+bounded whatever the size of the maze, and mazes too large for a single
+image can be cut into tiles.
+
+Example:
+    import raster
+    raster.save(m, "maze.png", scale=4)
+    raster.save_tiles(m, "tiles/", scale=8)
+"""
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+try:
+    from constants import (
+        COLOR_WALL, COLOR_PASSAGE, COLOR_SOLUTION, COLOR_START, COLOR_END,
+        TILE_PIXELS, PNG_COMPRESS_LEVEL, RENDER_CHUNK_BYTES
+    )
+except ImportError:
+    # Fallback if constants module is not available
+    COLOR_WALL = (0, 0, 0)
+    COLOR_PASSAGE = (255, 255, 255)
+    COLOR_SOLUTION = (0, 200, 255)
+    COLOR_START = (0, 160, 0)
+    COLOR_END = (220, 0, 0)
+    TILE_PIXELS = 4096
+    PNG_COMPRESS_LEVEL = 6
+    RENDER_CHUNK_BYTES = 1 << 20
+
+# Palette labels of the grid positions
+WALL = 0
+PASSAGE = 1
+SOLUTION = 2
+START = 3
+END = 4
+
+# RGB colour of every label
+PALETTE = np.array([COLOR_WALL, COLOR_PASSAGE, COLOR_SOLUTION, COLOR_START, COLOR_END], dtype=np.uint8)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Region of a grid as (first row, end row, first column, end column)
+Region = Tuple[int, int, int, int]
+Position = Tuple[int, int]
+
+
+def marks(start: Optional[Position] = None, end: Optional[Position] = None,
+          solutions: Optional[List[List[Position]]] = None) -> List[Tuple[np.ndarray, int]]:
+    """
+    Collect the positions drawn over the grid, in the order they are drawn.
+
+    Args:
+        start: Start position, if drawn
+        end: End position, if drawn
+        solutions: Solution paths, if drawn
+
+    Returns:
+        List of (n x 2 int64 array of positions, label) pairs
+    """
+    result = []
+    cells = [cell for path in solutions or [] if path for cell in path]
+    if cells:
+        result.append((np.asarray(cells, dtype=np.int64).reshape(-1, 2), SOLUTION))
+    for position, label in ((start, START), (end, END)):
+        if position is not None:
+            result.append((np.asarray([position], dtype=np.int64), label))
+    return result
+
+
+def labels(grid: np.ndarray, overlay: Sequence[Tuple[np.ndarray, int]] = (),
+           region: Optional[Region] = None) -> np.ndarray:
+    """
+    Palette labels of a region of the grid.
+
+    Args:
+        grid: 2D maze grid (1 = wall, 0 = passage)
+        overlay: Positions drawn over the grid, as returned by ``marks``
+        region: Part of the grid to label, the whole grid if not given
+
+    Returns:
+        uint8 array of labels with the region's shape
+
+    Raises:
+        ValueError: If the grid is not 2D
+    """
+    if grid.ndim != 2:
+        raise ValueError(f"Raster images are drawn from 2D grids, got a grid of shape {grid.shape}")
+    r0, r1, c0, c1 = region or (0, grid.shape[0], 0, grid.shape[1])
+    out = (grid[r0:r1, c0:c1] == 0).astype(np.uint8)  # PASSAGE where open, WALL elsewhere
+    for positions, label in overlay:
+        rows, cols = positions[:, 0], positions[:, 1]
+        inside = (rows >= r0) & (rows < r1) & (cols >= c0) & (cols < c1)
+        out[rows[inside] - r0, cols[inside] - c0] = label
+    return out
+
+
+def upscale(image: np.ndarray, scale: int) -> np.ndarray:
+    """
+    Blow every pixel of an image up to a scale x scale square.
+
+    Args:
+        image: Image whose first two axes are rows and columns
+        scale: Pixels per grid position along each axis
+
+    Returns:
+        The upscaled image (the input itself when scale is 1)
+    """
+    if scale == 1:
+        return image
+    return np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+
+
+def render(grid: np.ndarray, start: Optional[Position] = None, end: Optional[Position] = None,
+           solutions: Optional[List[List[Position]]] = None, scale: int = 1,
+           region: Optional[Region] = None) -> np.ndarray:
+    """
+    Render a maze as an RGB image.
+
+    Args:
+        grid: 2D maze grid (1 = wall, 0 = passage)
+        start: Start position, drawn if given
+        end: End position, drawn if given
+        solutions: Solution paths, drawn if given
+        scale: Pixels per grid position along each axis
+        region: Part of the grid to render, the whole grid if not given
+
+    Returns:
+        uint8 array of shape (rows * scale, columns * scale, 3)
+    """
+    _check_scale(scale)
+    return PALETTE[upscale(labels(grid, marks(start, end, solutions), region), scale)]
+
+
+def write_png(file: Union[str, BinaryIO], image: np.ndarray, palette: Optional[np.ndarray] = None,
+              level: int = PNG_COMPRESS_LEVEL) -> None:
+    """
+    Write an image as PNG.
+
+    Args:
+        file: File name or binary file object
+        image: uint8 image, (h, w, 3) for RGB or (h, w) for labels or grey levels
+        palette: RGB colour of every label of a 2D image; without it a 2D
+            image is written as greyscale
+        level: zlib compression level
+    """
+    with _open(file) as f:
+        _write_png(f, image.shape[1], image.shape[0], [image], palette, level)
+
+
+def write_ppm(file: Union[str, BinaryIO], image: np.ndarray, palette: Optional[np.ndarray] = None) -> None:
+    """
+    Write an image as binary PPM (P6).
+
+    Args:
+        file: File name or binary file object
+        image: uint8 image, (h, w, 3) for RGB or (h, w) for labels
+        palette: RGB colour of every label of a 2D image (defaults to PALETTE)
+    """
+    with _open(file) as f:
+        _write_ppm(f, image.shape[1], image.shape[0], [image], palette)
+
+
+def save(m, file: Union[str, BinaryIO], scale: int = 1, entrances: bool = True, solutions: bool = True,
+         fmt: Optional[str] = None, level: int = PNG_COMPRESS_LEVEL) -> None:
+    """
+    Write a whole maze as a single image.
+
+    The image is rendered and written a block of rows at a time; PNGs are
+    stored with the label palette, one byte per pixel.
+
+    Args:
+        m: Maze (anything with grid, start, end and solutions attributes)
+        file: File name or binary file object
+        scale: Pixels per grid position along each axis
+        entrances: Whether to draw the start and end points
+        solutions: Whether to draw the solution paths
+        fmt: "png" or "ppm", taken from the file name's extension if not given
+        level: zlib compression level of PNGs
+
+    Raises:
+        ValueError: If the maze has no grid or the format is unknown
+    """
+    if m.grid is None:
+        raise ValueError("Maze must be generated before it can be drawn")
+    _check_scale(scale)
+    fmt = _format(file, fmt)
+    overlay = _maze_marks(m, entrances, solutions)
+    H, W = m.grid.shape
+    blocks = _blocks(m.grid, overlay, (0, H, 0, W), scale)
+    with _open(file) as f:
+        if fmt == "png":
+            _write_png(f, W * scale, H * scale, blocks, PALETTE, level)
+        else:
+            _write_ppm(f, W * scale, H * scale, blocks, PALETTE)
+
+
+def save_tiles(m, directory: str, scale: int = 1, tile_pixels: int = TILE_PIXELS, entrances: bool = True,
+               solutions: bool = True, fmt: str = "png", prefix: str = "tile",
+               level: int = PNG_COMPRESS_LEVEL) -> List[str]:
+    """
+    Write a maze as a grid of tile images.
+
+    Tile (i, j) covers grid rows i * n to (i + 1) * n and columns j * n to
+    (j + 1) * n where n = tile_pixels // scale, and is written to
+    ``{prefix}_{i}_{j}.{fmt}`` in the directory. Only one tile is held in
+    memory at a time.
+
+    Args:
+        m: Maze (anything with grid, start, end and solutions attributes)
+        directory: Output directory, created if missing
+        scale: Pixels per grid position along each axis
+        tile_pixels: Largest width and height of a tile in pixels
+        entrances: Whether to draw the start and end points
+        solutions: Whether to draw the solution paths
+        fmt: "png" or "ppm"
+        prefix: File name prefix of the tiles
+        level: zlib compression level of PNGs
+
+    Returns:
+        Paths of the tiles written, row by row
+
+    Raises:
+        ValueError: If the maze has no grid, the format is unknown or a
+            tile cannot hold a single grid position
+    """
+    if m.grid is None:
+        raise ValueError("Maze must be generated before it can be drawn")
+    _check_scale(scale)
+    fmt = _format(None, fmt)
+    n = tile_pixels // scale
+    if n <= 0:
+        raise ValueError(f"Tiles of {tile_pixels} pixels cannot hold a grid position at scale {scale}")
+    os.makedirs(directory, exist_ok=True)
+    overlay = _maze_marks(m, entrances, solutions)
+    H, W = m.grid.shape
+    paths = []
+    for i, r0 in enumerate(range(0, H, n)):
+        for j, c0 in enumerate(range(0, W, n)):
+            tile = labels(m.grid, overlay, (r0, min(H, r0 + n), c0, min(W, c0 + n)))
+            path = os.path.join(directory, f"{prefix}_{i}_{j}.{fmt}")
+            if fmt == "png":
+                write_png(path, upscale(tile, scale), PALETTE, level)
+            else:
+                write_ppm(path, upscale(tile, scale), PALETTE)
+            paths.append(path)
+    return paths
+
+
+def _check_scale(scale: int) -> None:
+    # Scales are whole numbers of pixels
+    if scale <= 0:
+        raise ValueError(f"Scale must be a positive integer, got scale={scale}")
+
+
+def _format(file, fmt: Optional[str]) -> str:
+    # Output format from an explicit name or the file name's extension
+    if fmt is None:
+        fmt = os.path.splitext(file)[1][1:] if isinstance(file, str) else "png"
+    fmt = fmt.lower()
+    if fmt not in ("png", "ppm"):
+        raise ValueError(f"Unknown image format {fmt!r}, expected 'png' or 'ppm'")
+    return fmt
+
+
+def _maze_marks(m, entrances: bool, solutions: bool) -> List[Tuple[np.ndarray, int]]:
+    # Positions of a Maze drawn over its grid
+    if entrances and m.start and m.end:
+        start, end = m.start, m.end
+    else:
+        start = end = None
+    return marks(start, end, m.solutions if solutions else None)
+
+
+def _blocks(grid: np.ndarray, overlay, region: Region, scale: int) -> Iterator[np.ndarray]:
+    # Upscaled labels of a region, a block of rows of roughly RENDER_CHUNK_BYTES at a time
+    r0, r1, c0, c1 = region
+    rows = max(1, RENDER_CHUNK_BYTES // max(1, (c1 - c0) * scale * scale))
+    for top in range(r0, r1, rows):
+        yield upscale(labels(grid, overlay, (top, min(r1, top + rows), c0, c1)), scale)
+
+
+@contextmanager
+def _open(file: Union[str, BinaryIO]) -> Iterator[BinaryIO]:
+    # Open a file name for writing, or pass a file object through untouched
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            yield f
+    else:
+        yield file
+
+
+def _chunk(f: BinaryIO, tag: bytes, data: bytes) -> None:
+    # Length, tag, data and CRC of one PNG chunk
+    f.write(struct.pack(">I", len(data)))
+    f.write(tag)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+
+def _write_png(f: BinaryIO, width: int, height: int, blocks: Iterable[np.ndarray],
+               palette: Optional[np.ndarray], level: int) -> None:
+    # PNG of 8-bit indexed, greyscale or RGB rows given a block at a time
+    first = True
+    compressor = zlib.compressobj(level)
+    for block in blocks:
+        if first:
+            if block.ndim == 3:
+                color_type = 2  # RGB
+            else:
+                color_type = 0 if palette is None else 3  # greyscale or indexed
+            f.write(PNG_SIGNATURE)
+            _chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+            if color_type == 3:
+                _chunk(f, b"PLTE", np.ascontiguousarray(palette, dtype=np.uint8).tobytes())
+            first = False
+        # Every row starts with filter type 0 (none)
+        rows = np.zeros((block.shape[0], 1 + block[0].size), dtype=np.uint8)
+        rows[:, 1:] = block.reshape(block.shape[0], -1)
+        data = compressor.compress(rows.tobytes())
+        if data:
+            _chunk(f, b"IDAT", data)
+    _chunk(f, b"IDAT", compressor.flush())
+    _chunk(f, b"IEND", b"")
+
+
+def _write_ppm(f: BinaryIO, width: int, height: int, blocks: Iterable[np.ndarray],
+               palette: Optional[np.ndarray]) -> None:
+    # Binary PPM of RGB rows (or labels mapped through the palette) given a block at a time
+    palette = PALETTE if palette is None else np.asarray(palette, dtype=np.uint8)
+    f.write(f"P6\n{width} {height}\n255\n".encode("ascii"))
+    for block in blocks:
+        f.write((block if block.ndim == 3 else palette[block]).tobytes())
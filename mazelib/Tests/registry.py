@@ -0,0 +1,50 @@
+"""
+Name-to-class registry of the maze generators and solvers.
+
+Tools that select algorithms by name (benchmarks, batch jobs) look them
+up here, so a new generator or solver only has to be registered once.
+"""
+from BackTrackingGenerator import BacktrackingGenerator
+from BackTrackingSolver import BacktrackingSolver
+from BinaryTree import BinaryTree
+from Ellers import Ellers
+from Wilsons import Wilsons
+from Sidewinder import Sidewinder
+from Tremaux import Tremaux
+from RandomMouse import RandomMouse
+from ShortestPath import ShortestPath
+from AStar import AStar
+from BidirectionalBFS import BidirectionalBFS
+from DeadEndFilling import DeadEndFilling
+
+GENERATORS = {
+    cls.__name__: cls
+    for cls in (BacktrackingGenerator, BinaryTree, Ellers, Wilsons, Sidewinder)
+}
+
+SOLVERS = {
+    cls.__name__: cls
+    for cls in (BacktrackingSolver, Tremaux, RandomMouse, ShortestPath, AStar, BidirectionalBFS, DeadEndFilling)
+}
+
+
+def lookup(registry: dict, names: list) -> list:
+    """
+    Resolve algorithm names to classes.
+
+    Args:
+        registry: GENERATORS or SOLVERS
+        names: Class names to resolve; "all" selects every registered class
+
+    Returns:
+        List of classes in the order given
+
+    Raises:
+        ValueError: If a name is not registered
+    """
+    if "all" in names:
+        return list(registry.values())
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise ValueError(f"Unknown algorithm(s) {', '.join(unknown)}, expected one of {', '.join(registry)}")
+    return [registry[name] for name in names]
@@ -0,0 +1,154 @@
+"""
+Per-instance, seedable random number source.
+
+Every generator, solver and Maze owns a RandomBuffer instead of drawing
+from the global ``random`` / ``numpy.random`` state, so runs are
+reproducible per seed and independent across processes. Scalar draws are
+served from blocks of uniform floats pre-filled by a NumPy Generator,
+which costs far less per call than going to the generator every time.
+"""
+from typing import List, MutableSequence, Optional, Sequence, TypeVar, Union
+
+import numpy as np
+try:
+    from constants import RANDOM_BLOCK
+except ImportError:
+    # Fallback if constants module is not available
+    RANDOM_BLOCK = 4096
+
+T = TypeVar("T")
+
+# Anything a RandomBuffer can be built from
+Seed = Union[None, int, Sequence[int], np.random.SeedSequence, np.random.Generator, "RandomBuffer"]
+
+
+class RandomBuffer:
+    """
+    Buffered random draws from a NumPy Generator.
+
+    Attributes:
+        generator: The underlying np.random.Generator, for vectorized draws
+    """
+
+    def __init__(self, seed: Seed = None, block: int = RANDOM_BLOCK) -> None:
+        """
+        Create a random source.
+
+        Args:
+            seed: An int, sequence of ints or np.random.SeedSequence to seed a
+                new generator with, an existing np.random.Generator or
+                RandomBuffer to draw from, or None for fresh OS entropy
+            block: Number of uniform floats drawn per refill (must be positive)
+
+        Raises:
+            ValueError: If block is not a positive integer
+        """
+        if block <= 0:
+            raise ValueError(f"Random block size must be a positive integer, got block={block}")
+        if isinstance(seed, RandomBuffer):
+            seed = seed.generator
+        self.generator = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        self.block = int(block)
+        self._floats: List[float] = []
+        self._pos = 0
+
+    def random(self) -> float:
+        """
+        Draw a uniform float in [0, 1).
+
+        Returns:
+            The next float of the current block
+        """
+        if self._pos == len(self._floats):
+            self._floats = self.generator.random(self.block).tolist()
+            self._pos = 0
+        x = self._floats[self._pos]
+        self._pos += 1
+        return x
+
+    def randrange(self, start: int, stop: Optional[int] = None, step: int = 1) -> int:
+        """
+        Draw an integer from range(start, stop, step), like random.randrange.
+
+        Args:
+            start: Start of the range, or its stop if stop is not given
+            stop: End of the range (exclusive)
+            step: Step of the range
+
+        Returns:
+            A uniformly chosen member of the range
+
+        Raises:
+            ValueError: If the range is empty
+        """
+        if stop is None:
+            start, stop = 0, start
+        n = len(range(start, stop, step))
+        if n <= 0:
+            raise ValueError(f"Empty range for randrange({start}, {stop}, {step})")
+        return start + step * int(self.random() * n)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        """
+        Pick a uniformly random element of a non-empty sequence.
+
+        Args:
+            seq: Sequence to pick from
+
+        Returns:
+            The chosen element
+
+        Raises:
+            IndexError: If the sequence is empty
+        """
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[int(self.random() * len(seq))]
+
+    def shuffle(self, seq: MutableSequence[T]) -> None:
+        """
+        Shuffle a list in place (Fisher-Yates).
+
+        Args:
+            seq: List to shuffle
+        """
+        for i in range(len(seq) - 1, 0, -1):
+            j = int(self.random() * (i + 1))
+            seq[i], seq[j] = seq[j], seq[i]
+
+    def integers(self, high: int, size: int) -> List[int]:
+        """
+        Draw a block of integers in [0, high) for callers that buffer their own draws.
+
+        Args:
+            high: Exclusive upper bound
+            size: Number of integers
+
+        Returns:
+            List of integers
+        """
+        return self.generator.integers(0, high, size).tolist()
+
+    def floats(self, shape) -> np.ndarray:
+        """
+        Draw an array of uniform floats in [0, 1).
+
+        Args:
+            shape: Shape of the array
+
+        Returns:
+            Float64 array of the given shape
+        """
+        return self.generator.random(shape)
+
+    def permutation(self, n: int) -> np.ndarray:
+        """
+        Draw a random permutation of 0..n-1.
+
+        Args:
+            n: Number of elements
+
+        Returns:
+            Int64 array holding the permutation
+        """
+        return self.generator.permutation(n)
@@ -0,0 +1,550 @@
+"""
+Local maze service over HTTP.
+
+A small asyncio HTTP/1.1 server, listening on localhost TCP or a Unix
+socket, that generates and solves mazes on demand with the registered
+generators and solvers:
+
+    POST /generate            {"generator", "size", "seed"?}
+    POST /solve               {"solver", "shape", "grid", "start", "end", "clear"?, "seed"?}
+    POST /generate_and_solve  {"generator", "size", "solver", "clear"?, "seed"?}
+    GET  /stats               queue depth, batch sizes and latency percentiles
+
+``size`` is an int or the (w, h) pair the generator is built with, and
+grids travel as base64 of their packed wall bits (see corpus.pack_grid).
+Requests for the same operation, algorithms and size that arrive within
+``batch_window`` seconds of each other are coalesced into one batch and
+run by a single process pool task, so the pool's per-task cost is paid
+once per batch rather than once per maze.
+
+Responses are binary by default: a 4-byte little-endian header length, a
+JSON header (shape, start, end, solution length, ...), the packed grid
+bits and the solution as little-endian int64 flat indices. They are
+written in chunks, so large grids stream out while being sent. Add
+``"format": "json"`` to a request for a JSON response instead.
+
+Example:
+    python service.py --port 8765
+    curl -s localhost:8765/generate -d '{"generator": "Ellers", "size": 100}' > maze.bin
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import struct
+import sys
+from collections import deque
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from corpus import pack_grid, unpack_grid
+from maze import Maze
+from registry import GENERATORS, SOLVERS
+
+# Seconds a request waits for others of the same kind to join its batch
+BATCH_WINDOW = 0.005
+
+# Largest number of requests run as one batch
+MAX_BATCH = 64
+
+# Largest number of grid positions a request may ask for
+MAX_CELLS = 1 << 26
+
+# Number of recent latencies per operation kept for the percentiles
+LATENCY_WINDOW = 10000
+
+# Bytes written to a connection at a time
+STREAM_CHUNK = 1 << 16
+
+OPERATIONS = ("generate", "solve", "generate_and_solve")
+
+HEADER_LENGTH = struct.Struct("<I")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def run_batch(operation: str, generator: Optional[str], size: Optional[Tuple[int, int]],
+              solver: Optional[str], clear: bool, items: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """
+    Run one batch of requests (in a worker process).
+
+    Args:
+        operation: "generate", "solve" or "generate_and_solve"
+        generator: Generator class name (generating operations)
+        size: (w, h) the generator is built with (generating operations)
+        solver: Solver class name (solving operations)
+        clear: Whether solutions are cleared
+        items: Per-request values: ``seed`` and, for solve, ``shape``,
+            ``grid`` (packed bits), ``start`` and ``end``
+
+    Returns:
+        One result per item, with ``shape``, ``start``, ``end``, the packed
+        ``grid`` bits and the flat ``solution`` indices (None if not solved),
+        or the exception that item raised, so one bad request does not fail
+        the rest of its batch
+    """
+    grids = [None] * len(items)
+    if operation != "solve":
+        # Requests without a seed share one generator and its batch method
+        unseeded = [i for i, item in enumerate(items) if item.get("seed") is None]
+        if unseeded:
+            try:
+                batch = GENERATORS[generator](*size).generate_batch(len(unseeded))
+            except Exception as e:
+                batch = [e] * len(unseeded)
+            for i, grid in zip(unseeded, batch):
+                grids[i] = grid
+        for i, item in enumerate(items):
+            if grids[i] is None:
+                try:
+                    grids[i] = GENERATORS[generator](*size, seed=item["seed"]).generate()
+                except Exception as e:
+                    grids[i] = e
+
+    results = []
+    for item, grid in zip(items, grids):
+        if isinstance(grid, Exception):
+            results.append(grid)
+            continue
+        try:
+            results.append(_run_item(operation, solver, clear, item, grid))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _run_item(operation: str, solver: Optional[str], clear: bool, item: Dict[str, object],
+              grid: Optional[np.ndarray]) -> Dict[str, object]:
+    # Place entrances, solve and pack one request of a batch
+    m = Maze(seed=item.get("seed"), stats=False)
+    if operation == "solve":
+        m.grid = unpack_grid(item["grid"], item["shape"])
+        m.start, m.end = tuple(item["start"]), tuple(item["end"])
+    else:
+        m.grid = grid
+        m.generate_entrances()
+    solution = None
+    if operation != "generate":
+        m.solver = SOLVERS[solver](seed=item.get("seed"))
+        m.solve(clear)
+        cells = m.solutions[0] if m.solutions else []
+        solution = np.array([r * m.grid.shape[1] + c for r, c in cells], dtype="<i8").tobytes()
+    return {
+        "shape": list(m.grid.shape),
+        "start": list(m.start),
+        "end": list(m.end),
+        "grid": pack_grid(m.grid).tobytes(),
+        "solution": solution,
+    }
+
+
+def encode_response(result: Dict[str, object], extra: Optional[Dict[str, object]] = None) -> List[bytes]:
+    """
+    Binary encoding of a result.
+
+    Args:
+        result: One of the results returned by run_batch
+        extra: More header values (e.g. timings)
+
+    Returns:
+        The parts of the body: header length, JSON header, grid bits and
+        solution indices
+    """
+    solution = result["solution"]
+    header = {
+        "shape": result["shape"],
+        "start": result["start"],
+        "end": result["end"],
+        "grid_bytes": len(result["grid"]),
+        "solution_length": None if solution is None else len(solution) // 8,
+    }
+    header.update(extra or {})
+    data = json.dumps(header).encode()
+    return [HEADER_LENGTH.pack(len(data)), data, result["grid"], solution or b""]
+
+
+def decode_response(body: bytes) -> Tuple[Dict[str, object], np.ndarray, Optional[List[Tuple[int, int]]]]:
+    """
+    Decode a binary response body.
+
+    Args:
+        body: Body of a binary response
+
+    Returns:
+        (header, int8 grid, solution as (row, column) positions or None)
+    """
+    length, = HEADER_LENGTH.unpack_from(body)
+    header = json.loads(body[HEADER_LENGTH.size:HEADER_LENGTH.size + length])
+    pos = HEADER_LENGTH.size + length
+    grid = unpack_grid(np.frombuffer(body, dtype=np.uint8, count=header["grid_bytes"], offset=pos), header["shape"])
+    solution = None
+    if header["solution_length"] is not None:
+        pos += header["grid_bytes"]
+        flat = np.frombuffer(body, dtype="<i8", count=header["solution_length"], offset=pos)
+        solution = [divmod(int(i), header["shape"][1]) for i in flat]
+    return header, grid, solution
+
+
+class MazeService:
+    """
+    Request batching and dispatch to a process pool.
+
+    Attributes:
+        batch_window: Seconds a request waits for others to join its batch
+        max_batch: Largest number of requests per batch
+        queued: Number of requests waiting for their batch to be sent
+        running: Number of requests in batches being run
+        served: Number of requests answered, per operation
+        batches: Number of batches run
+        latencies: Recent request latencies in seconds, per operation
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_window: float = BATCH_WINDOW,
+                 max_batch: int = MAX_BATCH) -> None:
+        """
+        Create the service and its process pool.
+
+        Args:
+            workers: Number of worker processes, defaults to the CPU count
+            batch_window: Seconds a request waits for others to join its batch
+            max_batch: Largest number of requests per batch (must be positive)
+
+        Raises:
+            ValueError: If max_batch is not positive
+        """
+        if max_batch <= 0:
+            raise ValueError(f"Batch size must be a positive integer, got max_batch={max_batch}")
+        self.batch_window = batch_window
+        self.max_batch = int(max_batch)
+        # Spawned rather than forked: forking a process that runs the event loop
+        # and the pool's own threads can leave a worker holding a copied lock
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.queued = 0
+        self.running = 0
+        self.served = {operation: 0 for operation in OPERATIONS}
+        self.batches = 0
+        self.batch_sizes = 0
+        self.latencies = {operation: deque(maxlen=LATENCY_WINDOW) for operation in OPERATIONS}
+        self._pending: Dict[Tuple, List[Tuple[Dict[str, object], asyncio.Future]]] = {}
+
+    def parse(self, operation: str, request: Dict[str, object]) -> Tuple[Tuple, Dict[str, object]]:
+        """
+        Validate a request.
+
+        Args:
+            operation: "generate", "solve" or "generate_and_solve"
+            request: Decoded JSON body
+
+        Returns:
+            (batch key, per-request item) tuple
+
+        Raises:
+            ValueError: If the request is malformed or too large
+        """
+        generator = solver = size = None
+        clear = bool(request.get("clear", True))
+        item = {"seed": request.get("seed")}
+        if item["seed"] is not None and (not isinstance(item["seed"], int) or item["seed"] < 0):
+            raise ValueError(f"Seed must be a non-negative integer, got {item['seed']!r}")
+        if operation != "solve":
+            generator = request.get("generator")
+            if generator not in GENERATORS:
+                raise ValueError(f"Unknown generator {generator!r}, expected one of {', '.join(GENERATORS)}")
+            size = request.get("size")
+            size = (size, size) if isinstance(size, int) else tuple(size or ())
+            if len(size) != 2 or not all(isinstance(k, int) and k > 0 for k in size):
+                raise ValueError(f"Size must be a positive integer or a (w, h) pair, got {request.get('size')!r}")
+            if (2 * size[0] + 1) * (2 * size[1] + 1) > MAX_CELLS:
+                raise ValueError(f"Maze of size {size} exceeds the service limit of {MAX_CELLS} grid positions")
+        if operation != "generate":
+            solver = request.get("solver")
+            if solver not in SOLVERS:
+                raise ValueError(f"Unknown solver {solver!r}, expected one of {', '.join(SOLVERS)}")
+        if operation == "solve":
+            shape = tuple(request.get("shape") or ())
+            if len(shape) != 2 or not all(isinstance(k, int) and k >= 3 and k % 2 == 1 for k in shape):
+                raise ValueError(f"Shape must be a (rows, columns) pair of odd sizes, got {request.get('shape')!r}")
+            if shape[0] * shape[1] > MAX_CELLS:
+                raise ValueError(f"Grid of shape {shape} exceeds the service limit of {MAX_CELLS} grid positions")
+            for name in ("start", "end"):
+                position = request.get(name)
+                if (not isinstance(position, (list, tuple)) or len(position) != 2
+                        or not all(isinstance(k, int) and 0 <= k < size for k, size in zip(position, shape))):
+                    raise ValueError(f"{name.capitalize()} must be a (row, column) position inside the grid "
+                                     f"of shape {shape}, got {position!r}")
+            grid = np.frombuffer(base64.b64decode(request["grid"], validate=True), dtype=np.uint8)
+            # One wall bit per cell and axis, see corpus.pack_grid
+            nbytes = ((shape[0] // 2) * (shape[1] // 2) * 2 + 7) // 8
+            if len(grid) != nbytes:
+                raise ValueError(f"Grid of shape {shape} packs into {nbytes} bytes, got {len(grid)}")
+            item.update(shape=shape, start=tuple(request["start"]), end=tuple(request["end"]), grid=grid)
+            size = shape
+        return (operation, generator, size, solver, clear), item
+
+    async def submit(self, key: Tuple, item: Dict[str, object]) -> Dict[str, object]:
+        """
+        Queue a request and wait for its result.
+
+        Args:
+            key: Batch key returned by parse
+            item: Per-request item returned by parse
+
+        Returns:
+            The request's result from run_batch
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            # The first request of a batch decides when it is sent
+            batch = self._pending[key] = []
+            asyncio.get_running_loop().call_later(self.batch_window, self._dispatch, key, batch)
+        batch.append((item, future))
+        self.queued += 1
+        if len(batch) >= self.max_batch:
+            self._dispatch(key, batch)
+        return await future
+
+    def _dispatch(self, key: Tuple, batch: List) -> None:
+        # Send a batch to the pool, unless it has been sent already
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        self.queued -= len(batch)
+        self.running += len(batch)
+        self.batches += 1
+        self.batch_sizes += len(batch)
+        try:
+            task = self.pool.submit(run_batch, *key, [item for item, _ in batch])
+        except Exception as e:
+            # E.g. a broken pool: fail the batch rather than leave it waiting
+            task = concurrent.futures.Future()
+            task.set_exception(e)
+        asyncio.get_running_loop().create_task(self._collect(task, batch))
+
+    async def _collect(self, task, batch: List) -> None:
+        # Hand every request of a finished batch its own result or error
+        try:
+            results = await asyncio.wrap_future(task)
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            self.running -= len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def record(self, operation: str, seconds: float) -> None:
+        """
+        Record the latency of an answered request.
+
+        Args:
+            operation: The request's operation
+            seconds: Time from receiving the request to sending the last byte
+        """
+        self.served[operation] += 1
+        self.latencies[operation].append(seconds)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Current load and latency figures.
+
+        Returns:
+            Queue depth, requests in flight, batch counts and, per
+            operation, the number served and p50/p90/p99 latency in
+            milliseconds over the last LATENCY_WINDOW requests
+        """
+        operations = {}
+        for operation, window in self.latencies.items():
+            entry = {"served": self.served[operation]}
+            if window:
+                p50, p90, p99 = np.percentile(np.fromiter(window, dtype=np.float64), (50, 90, 99)) * 1000
+                entry.update(p50_ms=float(p50), p90_ms=float(p90), p99_ms=float(p99))
+            operations[operation] = entry
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.running,
+            "batches": self.batches,
+            "mean_batch_size": self.batch_sizes / self.batches if self.batches else 0.0,
+            "operations": operations,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the HTTP requests of one connection until it is closed.
+
+        Args:
+            reader: Connection reader
+            writer: Connection writer
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                t0 = perf_counter()
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self.respond(writer, method, target.split("?")[0].strip("/"), body, keep_alive, t0)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes,
+                      keep_alive: bool, t0: float) -> None:
+        """
+        Answer one HTTP request.
+
+        Args:
+            writer: Connection writer
+            method: HTTP method
+            path: Request path without slashes or query
+            body: Request body
+            keep_alive: Whether the connection stays open afterwards
+            t0: perf_counter value when the request arrived
+        """
+        if path == "stats":
+            await self.send(writer, 200, [json.dumps(self.stats()).encode()], "application/json", keep_alive)
+            return
+        if path not in OPERATIONS:
+            await self.send(writer, 404, [json.dumps({"error": f"Unknown path /{path}"}).encode()],
+                            "application/json", keep_alive)
+            return
+        if method != "POST":
+            await self.send(writer, 405, [json.dumps({"error": f"/{path} only accepts POST"}).encode()],
+                            "application/json", keep_alive)
+            return
+        try:
+            request = json.loads(body or b"{}")
+            key, item = self.parse(path, request)
+        except (ValueError, KeyError, TypeError) as e:
+            await self.send(writer, 400, [json.dumps({"error": str(e)}).encode()], "application/json", keep_alive)
+            return
+        try:
+            result = await self.submit(key, item)
+        except Exception as e:
+            await self.send(writer, 500, [json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()],
+                            "application/json", keep_alive)
+            return
+
+        extra = {"service_ms": (perf_counter() - t0) * 1000}
+        if request.get("format", "binary") == "json":
+            solution = result["solution"]
+            data = {
+                "shape": result["shape"],
+                "start": result["start"],
+                "end": result["end"],
+                "grid": base64.b64encode(result["grid"]).decode("ascii"),
+                "solution": None if solution is None
+                else [list(divmod(int(i), result["shape"][1])) for i in np.frombuffer(solution, dtype="<i8")],
+            }
+            data.update(extra)
+            await self.send(writer, 200, [json.dumps(data).encode()], "application/json", keep_alive)
+        else:
+            await self.send(writer, 200, encode_response(result, extra), "application/octet-stream", keep_alive)
+        self.record(path, perf_counter() - t0)
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, parts: List[bytes], content_type: str,
+                   keep_alive: bool) -> None:
+        """
+        Write an HTTP response, streaming its body in STREAM_CHUNK pieces.
+
+        Args:
+            writer: Connection writer
+            status: HTTP status code
+            parts: Pieces of the body, sent in order
+            content_type: Content-Type of the body
+            keep_alive: Whether the connection stays open afterwards
+        """
+        length = sum(len(part) for part in parts)
+        writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                      f"Content-Length: {length}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                     .encode("latin-1"))
+        for part in parts:
+            view = memoryview(part)
+            for pos in range(0, len(view), STREAM_CHUNK):
+                writer.write(view[pos:pos + STREAM_CHUNK])
+                # Let the client drain large bodies instead of buffering them whole
+                await writer.drain()
+        await writer.drain()
+
+    def close(self) -> None:
+        """Shut the process pool down."""
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(service: MazeService, host: str = "127.0.0.1", port: int = 8765,
+                unix: Optional[str] = None) -> None:
+    """
+    Serve requests until cancelled.
+
+    Args:
+        service: The service answering requests
+        host: Address to listen on over TCP
+        port: TCP port
+        unix: Path of a Unix socket to listen on instead of TCP
+    """
+    # An empty batch starts the workers and their imports before the first request
+    await asyncio.wrap_future(service.pool.submit(run_batch, "generate", None, None, None, True, []))
+    if unix is not None:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Serve maze generation and solving over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW * 1000,
+                        help="milliseconds a request waits for others to join its batch")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="largest number of requests per batch")
+    args = parser.parse_args(argv)
+    if args.workers <= 0 or args.max_batch <= 0 or args.batch_window_ms < 0:
+        parser.error("workers and max batch must be positive and the batch window non-negative")
+
+    service = MazeService(args.workers, args.batch_window_ms / 1000, args.max_batch)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Per-phase timers and counters for maze runs.
+
+A Maze records every generate, entrances, solve and clear phase it runs in
+its ``stats`` object: the wall time of the phase and the counters the
+algorithm reported for it (cells carved, neighbour queries, steps walked,
+backtracks, peak path length, bytes of solver state, ...). Records can be
+summarised, dumped as JSON or exported as a Chrome trace (load it in
+chrome://tracing or https://ui.perfetto.dev).
+
+Counters are collected from the algorithms once a phase is over, never
+inside their loops, and a Maze built with ``stats=False`` gets a NullStats
+whose methods do nothing at all.
+"""
+import json
+import os
+from contextlib import contextmanager, nullcontext
+from time import perf_counter_ns
+from typing import Dict, Iterator, List, Optional
+
+
+class Stats:
+    """
+    Timings and counters of the phases run so far.
+
+    Attributes:
+        enabled: Whether anything is recorded
+        records: One dictionary per phase run, in order, holding its
+            ``name``, ``start_ns``, ``duration_ns`` and ``counters``
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        """Create an empty set of records."""
+        self.records: List[Dict[str, object]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, object]]:
+        """
+        Time a phase.
+
+        Args:
+            name: Name of the phase (e.g. "generate", "solve")
+
+        Yields:
+            The phase's record, which is appended to ``records``
+        """
+        record = {"name": name, "start_ns": perf_counter_ns(), "duration_ns": 0, "counters": {}}
+        self.records.append(record)
+        try:
+            yield record
+        finally:
+            record["duration_ns"] = perf_counter_ns() - record["start_ns"]
+
+    def count(self, **counters: int) -> None:
+        """
+        Add counters to the most recent phase.
+
+        Args:
+            **counters: Counter values by name
+        """
+        if self.records:
+            self.records[-1]["counters"].update(counters)
+
+    def last(self, name: str) -> Optional[Dict[str, object]]:
+        """
+        Most recent record of a phase.
+
+        Args:
+            name: Name of the phase
+
+        Returns:
+            The record, or None if the phase has not run
+        """
+        for record in reversed(self.records):
+            if record["name"] == name:
+                return record
+        return None
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """
+        Aggregate the records per phase.
+
+        Counters whose name starts with ``peak_`` keep their maximum, all
+        other counters are summed.
+
+        Returns:
+            Dictionary mapping every phase name to its number of calls,
+            total nanoseconds and aggregated counters
+        """
+        phases = {}
+        for record in self.records:
+            phase = phases.setdefault(record["name"], {"calls": 0, "total_ns": 0, "counters": {}})
+            phase["calls"] += 1
+            phase["total_ns"] += record["duration_ns"]
+            totals = phase["counters"]
+            for key, value in record["counters"].items():
+                if key.startswith("peak_"):
+                    totals[key] = max(totals.get(key, value), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return phases
+
+    def reset(self) -> None:
+        """Drop every record."""
+        self.records.clear()
+
+    def to_json(self, path: str) -> None:
+        """
+        Write the records and their summary as JSON.
+
+        Args:
+            path: Output file path
+        """
+        with open(path, "w") as f:
+            json.dump({"records": self.records, "summary": self.summary()}, f, indent=2)
+
+    def to_chrome_trace(self, path: str) -> None:
+        """
+        Write the records in the Chrome trace event format.
+
+        Every phase becomes a complete ("X") event with its counters as
+        arguments.
+
+        Args:
+            path: Output file path
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": record["name"],
+                "cat": "maze",
+                "ph": "X",
+                "ts": record["start_ns"] / 1000,
+                "dur": record["duration_ns"] / 1000,
+                "pid": pid,
+                "tid": 0,
+                "args": record["counters"],
+            }
+            for record in self.records
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class NullStats(Stats):
+    """
+    Stats that record nothing; every method returns immediately.
+    """
+
+    enabled = False
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def count(self, **counters: int) -> None:
+        return None
@@ -0,0 +1,333 @@
+"""
+Path query index for perfect mazes.
+
+Every generator in this package carves a spanning tree, so the route
+between any two cells is unique. This module roots that tree once per
+grid, keeps parent/depth arrays and binary-lifting ancestor tables, and
+then answers the distance between any pair of cells in O(log n) and the
+path itself in O(path length), without walking the maze again.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adjacency import build_adjacency, DEGREE, NEIGHBOUR_OFFSETS
+from disjoint_set import index_dtype
+
+
+class TreeIndex:
+    """
+    Rooted-tree index over the cells of a perfect 2D maze.
+
+    Cells are numbered row by row, so cell (r, c) of the grid has id
+    (r // 2) * w + c // 2 where w is the number of cells per row. A grid
+    made of several separate trees is indexed as a forest; queries between
+    cells of different trees report that there is no path.
+
+    Attributes:
+        shape: Shape of the indexed grid
+        parent: Parent id of every cell (roots point at themselves)
+        depth: Number of steps from every cell to the root of its tree
+        component: Id of the root of every cell's tree
+        up: Binary-lifting table, up[k][i] is the 2**k-th ancestor of cell i
+    """
+
+    def __init__(self, shape: Tuple[int, int], parent: np.ndarray, depth: np.ndarray,
+                 component: np.ndarray, up: np.ndarray) -> None:
+        """
+        Wrap prebuilt index tables; use ``build`` or ``load`` to create an index.
+
+        Args:
+            shape: Shape of the indexed grid
+            parent: Parent id of every cell
+            depth: Depth of every cell
+            component: Root id of every cell's tree
+            up: Binary-lifting table of shape (levels, cells)
+        """
+        self.shape = tuple(int(size) for size in shape)
+        self.parent = parent
+        self.depth = depth
+        self.component = component
+        self.up = up
+        self._width = self.shape[1] // 2
+        # Memoryview lookups avoid building a NumPy scalar on every step
+        self._up = [memoryview(level) for level in up]
+        self._depth = memoryview(depth)
+        self._component = memoryview(component)
+
+    @classmethod
+    def build(cls, grid: np.ndarray, adjacency: Optional[np.ndarray] = None) -> "TreeIndex":
+        """
+        Root the maze's spanning tree and build the ancestor tables.
+
+        Args:
+            grid: The maze grid (1 = wall, 0 = passage)
+            adjacency: Precomputed open-direction mask of the grid, built if not given
+
+        Returns:
+            The index
+
+        Raises:
+            ValueError: If the grid is not 2D or its passages contain a loop
+        """
+        if grid.ndim != 2:
+            raise ValueError(f"Tree indexes work on 2D grids, got a grid of shape {grid.shape}")
+        if adjacency is None:
+            adjacency = build_adjacency(grid)
+        H, W = grid.shape
+        h, w = H // 2, W // 2
+        n = h * w
+        masks = np.ascontiguousarray(adjacency[1:H - 1:2, 1:W - 1:2]).reshape(-1)
+        # Every passage between two cells shows up in both of their masks
+        edges = int(DEGREE[masks].sum(dtype=np.int64)) // 2
+
+        # Neighbour id jumps for every mask, in cell ids instead of grid positions
+        steps = tuple(tuple((dr // 2) * w + dc // 2 for dr, dc in offsets) for offsets in NEIGHBOUR_OFFSETS)
+        dtype = index_dtype(n)
+        parent = np.full(n, -1, dtype=dtype)
+        depth = np.zeros(n, dtype=dtype)
+        component = np.empty(n, dtype=dtype)
+        open_directions = memoryview(masks)
+        parents, depths, components = memoryview(parent), memoryview(depth), memoryview(component)
+
+        # Breadth-first search from every cell not reached yet, one tree at a time
+        trees = 0
+        order = []
+        for root in range(n):
+            if parents[root] >= 0:
+                continue
+            trees += 1
+            parents[root] = root
+            components[root] = root
+            head = len(order)
+            order.append(root)
+            while head < len(order):
+                current = order[head]
+                head += 1
+                d = depths[current] + 1
+                for step in steps[open_directions[current]]:
+                    nxt = current + step
+                    if parents[nxt] < 0:
+                        parents[nxt] = current
+                        depths[nxt] = d
+                        components[nxt] = root
+                        order.append(nxt)
+
+        # A forest of n cells in k trees has exactly n - k passages; any more means a loop
+        if edges != n - trees:
+            raise ValueError("Maze passages contain a loop, so paths between cells are not unique")
+
+        # up[k] is the 2**k-th ancestor; roots are their own ancestors
+        levels = max(1, int(depth.max()).bit_length())
+        up = np.empty((levels, n), dtype=dtype)
+        up[0] = parent
+        for k in range(1, levels):
+            up[k] = up[k - 1][up[k - 1]]
+        return cls((H, W), parent, depth, component, up)
+
+    def cell_id(self, cell: Tuple[int, int]) -> int:
+        """
+        Id of a grid cell.
+
+        Args:
+            cell: (row, column) of a cell (odd row and column)
+
+        Returns:
+            The cell's id
+
+        Raises:
+            ValueError: If the position is not a cell of the indexed grid
+        """
+        r, c = cell
+        if r % 2 == 0 or c % 2 == 0 or not (0 < r < self.shape[0] and 0 < c < self.shape[1]):
+            raise ValueError(f"{cell} is not a cell of a grid of shape {self.shape}")
+        return (r // 2) * self._width + c // 2
+
+    def _cell_ids(self, cells: np.ndarray) -> np.ndarray:
+        # Ids of an (n, 2) array of cells, checked like cell_id
+        r, c = cells[:, 0], cells[:, 1]
+        bad = (r % 2 == 0) | (c % 2 == 0) | (r <= 0) | (r >= self.shape[0]) | (c <= 0) | (c >= self.shape[1])
+        if bad.any():
+            cell = tuple(int(k) for k in cells[np.argmax(bad)])
+            raise ValueError(f"{cell} is not a cell of a grid of shape {self.shape}")
+        return (r // 2) * self._width + c // 2
+
+    def cell_position(self, i: int) -> Tuple[int, int]:
+        """
+        Grid position of a cell id.
+
+        Args:
+            i: Cell id
+
+        Returns:
+            (row, column) of the cell
+        """
+        r, c = divmod(i, self._width)
+        return 2 * r + 1, 2 * c + 1
+
+    def lca(self, a: int, b: int) -> int:
+        """
+        Lowest common ancestor of two cells.
+
+        Args:
+            a: First cell id
+            b: Second cell id
+
+        Returns:
+            Id of the deepest cell that is an ancestor of both, or -1 if the
+            cells lie in different trees
+        """
+        if self._component[a] != self._component[b]:
+            return -1
+        depth, up = self._depth, self._up
+        if depth[a] < depth[b]:
+            a, b = b, a
+        # Lift the deeper cell to the other's depth
+        diff = depth[a] - depth[b]
+        k = 0
+        while diff:
+            if diff & 1:
+                a = up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        # Lift both as far as they stay apart; their parent is then the answer
+        for k in range(len(up) - 1, -1, -1):
+            if up[k][a] != up[k][b]:
+                a, b = up[k][a], up[k][b]
+        return up[0][a]
+
+    def distance(self, start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        """
+        Number of cell-to-cell moves on the path between two cells.
+
+        Args:
+            start: (row, column) of the first cell
+            end: (row, column) of the second cell
+
+        Returns:
+            Number of moves, or -1 if there is no path
+        """
+        a, b = self.cell_id(start), self.cell_id(end)
+        ancestor = self.lca(a, b)
+        if ancestor < 0:
+            return -1
+        return self._depth[a] + self._depth[b] - 2 * self._depth[ancestor]
+
+    def distances(self, starts: Sequence[Tuple[int, int]], ends: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """
+        Answer many distance queries at once.
+
+        The binary-lifting steps run as NumPy operations over all pairs, so
+        the cost per query is a few array passes rather than Python calls.
+
+        Args:
+            starts: (row, column) of the first cell of every pair
+            ends: (row, column) of the second cell of every pair
+
+        Returns:
+            int64 array of moves per pair, -1 where there is no path
+
+        Raises:
+            ValueError: If the lists differ in length or a position is not a
+                cell of the indexed grid
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        if len(starts) != len(ends):
+            raise ValueError(f"Got {len(starts)} start cells but {len(ends)} end cells")
+        a = self._cell_ids(starts)
+        b = self._cell_ids(ends)
+        depth = self.depth.astype(np.int64)
+        da, db = depth[a], depth[b]
+
+        # Lift the deeper cell of every pair to the other's depth
+        x, y = np.where(da >= db, a, b), np.where(da >= db, b, a)
+        diff = np.abs(da - db)
+        for k in range(len(self.up)):
+            lift = (diff >> k) & 1 == 1
+            x[lift] = self.up[k][x[lift]]
+        # Lift both as far as they stay apart
+        for k in range(len(self.up) - 1, -1, -1):
+            ux, uy = self.up[k][x], self.up[k][y]
+            apart = ux != uy
+            x[apart], y[apart] = ux[apart], uy[apart]
+        ancestor = np.where(x == y, x, self.up[0][x])
+
+        result = da + db - 2 * depth[ancestor]
+        result[self.component[a] != self.component[b]] = -1
+        return result
+
+    def path(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        The path between two cells, in the same shape solvers return.
+
+        Args:
+            start: (row, column) of the first cell
+            end: (row, column) of the second cell
+
+        Returns:
+            List of (row, column) positions from start to end with the walls
+            in between, excluding start and end themselves, or None if there
+            is no path
+        """
+        a, b = self.cell_id(start), self.cell_id(end)
+        ancestor = self.lca(a, b)
+        if ancestor < 0:
+            return None
+        parent = self._up[0]
+        # Climb from both ends up to the common ancestor
+        rising = [a]
+        while rising[-1] != ancestor:
+            rising.append(parent[rising[-1]])
+        falling = [b]
+        while falling[-1] != ancestor:
+            falling.append(parent[falling[-1]])
+        cells = [self.cell_position(i) for i in rising + falling[-2::-1]]
+
+        path = []
+        for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+            path.append(((r0 + r1) // 2, (c0 + c1) // 2))
+            path.append((r1, c1))
+        return path[:-1]
+
+    def save(self, file, grid: Optional[np.ndarray] = None) -> None:
+        """
+        Save the index, optionally with its grid, to an .npz file.
+
+        Args:
+            file: File name or file object
+            grid: Grid to store alongside the index
+
+        Raises:
+            ValueError: If the grid does not have the index's shape
+        """
+        arrays = {
+            "shape": np.array(self.shape, dtype=np.int64),
+            "parent": self.parent,
+            "depth": self.depth,
+            "component": self.component,
+            "up": self.up,
+        }
+        if grid is not None:
+            if grid.shape != self.shape:
+                raise ValueError(f"Grid shape {grid.shape} does not match index shape {self.shape}")
+            arrays["grid"] = grid
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file) -> Tuple["TreeIndex", Optional[np.ndarray]]:
+        """
+        Load an index saved with ``save``.
+
+        Args:
+            file: File name or file object
+
+        Returns:
+            (index, grid) tuple; grid is None if it was not saved
+        """
+        with np.load(file) as data:
+            index = cls(tuple(data["shape"]), data["parent"], data["depth"], data["component"], data["up"])
+            grid = data["grid"] if "grid" in data else None
+        return index, grid
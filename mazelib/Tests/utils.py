@@ -4,7 +4,9 @@ Utility functions for maze operations.
 This module provides helper functions used across the maze generation
 and solving system.
 """
-from typing import Tuple, List
+import os
+import tempfile
+from typing import Callable, Optional, Tuple, List
 import numpy as np
 
 
@@ -69,3 +71,41 @@ def validate_grid_size(height: int, width: int, min_size: int = 3) -> None:
             f"minimum size is {min_size}x{min_size}"
         )
 
+
+def readonly_view(array: np.ndarray) -> np.ndarray:
+    """
+    Return a read-only view of an array without copying its data.
+
+    Args:
+        array: Array to view (may be a np.memmap)
+
+    Returns:
+        A view sharing the array's memory with the writeable flag cleared
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def memmap_factory(directory: Optional[str] = None, prefix: str = "maze-") -> Callable[[Tuple[int, ...], type], np.ndarray]:
+    """
+    Build an array factory that backs every array with a file on disk.
+
+    Generators, solvers and ``Maze`` accept such a factory for their large
+    arrays, so mazes bigger than RAM can be generated and solved with the
+    operating system paging the data in and out.
+
+    Args:
+        directory: Directory the backing files are created in, defaults to
+            the system temporary directory
+        prefix: File name prefix of the backing files
+
+    Returns:
+        A callable taking (shape, dtype) and returning a new zero-filled
+        np.memmap; its backing file is left in place for the caller to remove
+    """
+    def factory(shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=".dat", dir=directory)
+        os.close(fd)
+        return np.memmap(path, dtype=dtype, mode="w+", shape=tuple(shape))
+    return factory